@@ -0,0 +1,131 @@
+"""Memory benchmark of SideMenu items.
+
+Measures bytes per item with tracemalloc for the dataclass SideMenuItem the menus module used before
+(copied below as LegacySideMenuItem) and the slotted SideMenuItem, and bytes per rendered row for
+the SideMenuItem copies render_group_items used to return and the SideMenuItemView it returns now.
+Bytes per item a process allocates for a nested menu are measured for a menu built in the process
+and for a menu opened from a shared, memory-mapped file, which creates sub items only when expanded.
+
+    python benchmarks/memory.py --items 10000 --output memory.json
+"""
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from menus import SideMenu, SideMenuItem, SideMenuItemView, open_shared, save_shared  # noqa: E402
+
+
+@dataclass
+class LegacySideMenuItem:
+    name: str
+    label: str
+    group: Optional[str] = None
+    icon: Optional[str] = "ChevronRightMed"
+    expanded_icon: Optional[str] = "ChevronDownMed"
+    disabled: Optional[bool] = False
+    expand_always: Optional[bool] = False
+    render: Optional[bool] = False
+    sub_items: List = field(default_factory=list)
+
+
+def measure(build: Callable[[], object], count: int) -> float:
+    """Returns bytes allocated per item by build, which creates count items"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000, help="Number of items to build")
+    parser.add_argument("--output", help="Write the results as JSON into this file")
+    args = parser.parse_args()
+    count = args.items
+
+    # Names and labels are created up front, they are the same for both item types
+    names = [f"item_{i}" for i in range(count)]
+    labels = [f"Item {i}" for i in range(count)]
+    groups = [f"Group {i // 100}" for i in range(count)]
+
+    def build_legacy():
+        return [
+            LegacySideMenuItem(name=names[i], label=labels[i], group=groups[i], render=True)
+            for i in range(count)
+        ]
+
+    def build_slotted():
+        return [
+            SideMenuItem(name=names[i], label=labels[i], group=groups[i], render=True)
+            for i in range(count)
+        ]
+
+    items = build_slotted()
+    side_menu = SideMenu(items=items)
+
+    def build_legacy_rows():
+        return [
+            LegacySideMenuItem(name=item.name, label=item.label, group=item.group, icon=item.icon)
+            for item in items
+        ]
+
+    def build_views():
+        return [
+            SideMenuItemView(item.name, item.label, item.icon, item.disabled, item.group)
+            for item in items
+        ]
+
+    results = {
+        "items": count,
+        "item_bytes_before": measure(build_legacy, count),
+        "item_bytes_after": measure(build_slotted, count),
+        "index_bytes": measure(lambda: SideMenu(items=build_slotted()), count)
+        - measure(build_slotted, count),
+        "render_row_bytes_before": measure(build_legacy_rows, count),
+        "render_row_bytes_after": measure(build_views, count),
+    }
+    del side_menu
+
+    def build_nested():
+        return SideMenu(
+            items=[
+                SideMenuItem(
+                    name=names[i],
+                    label=labels[i],
+                    group=groups[i],
+                    render=True,
+                    sub_items=[
+                        SideMenuItem(name=names[j], label=labels[j]) for j in range(i + 1, i + 5)
+                    ],
+                )
+                for i in range(0, count - 4, 5)
+            ]
+        )
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory, "menu.smnu")
+        save_shared(build_nested(), path)
+        results["nested_menu_bytes"] = measure(build_nested, count)
+        results["shared_menu_bytes"] = measure(lambda: open_shared(path), count)
+        gc.collect()  # Closes the mappings before the directory is removed
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report)
+
+
+if __name__ == "__main__":
+    main()
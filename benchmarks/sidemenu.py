@@ -0,0 +1,229 @@
+"""Benchmark of SideMenu rendering and click handling on synthetic menus.
+
+Menus of 10, 100, 1k and 10k items are generated with different group counts and nesting depths.
+A tutorial style serve cycle runs against a stub Q object, so no Wave server is needed.
+
+    python benchmarks/sidemenu.py --sizes 10 100 1000 10000 --output sidemenu.json
+
+Results are written as JSON: median microseconds per call for each menu and operation.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from h2o_wave import Expando, ui  # noqa: E402
+from h2o_wave.core import AsyncPage  # noqa: E402
+
+from menus import SideMenu, SideMenuItem  # noqa: E402
+
+
+class StubSite:
+    """Stands in for the Wave site, keeps the size of the last saved page diff"""
+
+    def __init__(self):
+        self.saved_bytes = 0
+
+    async def _save(self, url: str, patch: str):
+        self.saved_bytes = len(patch)
+
+
+class StubQ:
+    """Minimal query context with the attributes used by the tutorials"""
+
+    def __init__(self, app: Expando, client: Expando, site: StubSite):
+        self.app = app
+        self.client = client
+        self.args = Expando()
+        self.page = AsyncPage(site, "/client")
+
+
+def build_items(size: int, groups: int, depth: int) -> List[SideMenuItem]:
+    """Returns size items in total, spread over the groups, each root item having children
+    nested depth levels deep"""
+    per_root = sum(4**level for level in range(depth))  # Root with 4 children per level
+    roots = max(1, size // per_root)
+    counter = iter(range(size))
+
+    def build(prefix: str, level: int) -> List[SideMenuItem]:
+        sub_items = []
+        if level < depth - 1:
+            for _ in range(4):
+                index = next(counter, None)
+                if index is None:
+                    break
+                sub_items.append(
+                    SideMenuItem(
+                        name=f"{prefix}_{index}",
+                        label=f"Item {index} of {prefix}",
+                        sub_items=build(f"{prefix}_{index}", level + 1),
+                    )
+                )
+        return sub_items
+
+    items = []
+    for root in range(roots):
+        index = next(counter, None)
+        if index is None:
+            break
+        items.append(
+            SideMenuItem(
+                name=f"item_{index}",
+                label=f"Item {index}",
+                group=f"Group {root % groups}",
+                render=True,
+                sub_items=build(f"item_{index}", 0),
+            )
+        )
+    return items
+
+
+def bench(fn: Callable[[], object], min_time: float) -> float:
+    """Returns median microseconds per call, running fn in batches for at least min_time seconds"""
+    batch = 1
+    while True:  # Grow the batch until it takes at least a millisecond
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= 0.001:
+            break
+        batch *= 2
+    timings = [elapsed / batch]
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline or len(timings) < 5:
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        timings.append((time.perf_counter() - start) / batch)
+    return statistics.median(timings) * 1e6
+
+
+async def serve(q: StubQ):
+    """Tutorial style serve cycle, see collapsable_expanding_tutorial.py"""
+    side_menu: SideMenu = q.app.side_menu
+    if q.client.side_menu_state is None:
+        q.client.side_menu_state = side_menu.new_state()
+        q.client.active_page = side_menu.items[0].name
+    state = q.client.side_menu_state
+    active_page = await side_menu.handle_click(q, state)
+    if active_page:
+        q.client.active_page = active_page
+    if side_menu.layout_changed(state):
+        q.page["meta"] = ui.meta_card(
+            box="",
+            layouts=[ui.layout(breakpoint="xs", zones=[side_menu.get_layout(state)])],
+        )
+    side_menu.render(q, state, value=q.client.active_page)
+    await q.page.save()
+
+
+def run_menu(size: int, groups: int, depth: int, min_time: float) -> Dict:
+    items = build_items(size, groups, depth)
+    side_menu = SideMenu(items=items)
+    state = side_menu.new_state()
+    root = next(item for item in items if len(item.sub_items) > 0) if depth > 1 else items[0]
+    leaf = root
+    while len(leaf.sub_items) > 0:
+        leaf = leaf.sub_items[-1]
+    side_menu.select(leaf.name, state)
+
+    def cold_nav_content():
+        side_menu.invalidate()
+        side_menu.get_nav_content(None, state)
+
+    site = StubSite()
+    q = StubQ(Expando(dict(side_menu=side_menu)), Expando(), site)
+    loop = asyncio.new_event_loop()
+    clicks = [root.name, leaf.name, SideMenu.toggle_collapse_name, SideMenu.toggle_collapse_name]
+    click_index = [0]
+
+    def serve_cycle():
+        q.args = Expando({clicks[click_index[0] % len(clicks)]: True})
+        click_index[0] += 1
+        loop.run_until_complete(serve(q))
+
+    def toggle_subitems():
+        side_menu.enable_subitems(root.name, state)
+        side_menu.disable_subitems(root.name, state)
+
+    def filter_nav_content():
+        side_menu.invalidate()
+        side_menu.set_filter(leaf.label, state)
+        side_menu.get_nav_content(None, state)
+        side_menu.set_filter(None, state)
+
+    def toggle_after_change():
+        side_menu.invalidate()
+        side_menu.get_nav_content(None, state)
+        side_menu.toggle_state(state)
+        side_menu.get_nav_content(None, state)
+        side_menu.toggle_state(state)
+
+    timings = {
+        "get_nav_content_cold": bench(cold_nav_content, min_time),
+        "get_nav_content_cached": bench(lambda: side_menu.get_nav_content(None, state), min_time),
+        "width": bench(lambda: side_menu.get_width(state), min_time),
+        "get_item": bench(lambda: side_menu.get_item(leaf.name), min_time),
+        "get_root_item": bench(lambda: side_menu.get_root_item(leaf.name), min_time),
+        "enable_disable_subitems": bench(toggle_subitems, min_time),
+        "toggle_after_change": bench(toggle_after_change, min_time),
+        "serve_cycle": bench(serve_cycle, min_time),
+        "search": bench(lambda: side_menu.search(leaf.label, limit=10), min_time),
+        "filter_nav_content": bench(filter_nav_content, min_time),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in ("json", "pickle"):
+            path = Path(directory, f"menu.{suffix}")
+            side_menu.save(path)
+            timings[f"load_{suffix}"] = bench(lambda: SideMenu.load(path), min_time)
+    loop.close()
+    return {
+        "size": len(side_menu._index),
+        "groups": len(side_menu.groups()),
+        "depth": depth,
+        "timings_us": timings,
+        "last_save_bytes": site.saved_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to run each operation")
+    parser.add_argument("--output", help="Write the results as JSON into this file")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for depth in args.depths:
+            groups = max(1, min(40, size // 25))
+            result = run_menu(size, groups, depth, args.min_time)
+            results.append(result)
+            print(
+                f"{result['size']:>6} items {result['groups']:>3} groups depth {depth}: "
+                + ", ".join(f"{key} {value:.1f}us" for key, value in result["timings_us"].items()),
+                file=sys.stderr,
+            )
+
+    report = json.dumps(
+        {"python": platform.python_version(), "results": results},
+        indent=2,
+    )
+    if args.output:
+        Path(args.output).write_text(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
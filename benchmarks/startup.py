@@ -0,0 +1,98 @@
+"""Cold start benchmark of the SideMenu.
+
+Each run starts a fresh interpreter, imports h2o_wave and menus, and renders a menu for the first time.
+Import time of menus is reported without h2o_wave, which the app imports anyway.
+
+    python benchmarks/startup.py --runs 5 --max-import-ms 50 --max-first-render-ms 50
+
+Exits with 1 if the median of a measurement is over its limit.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import h2o_wave
+wave_imported = time.perf_counter()
+from menus import SideMenu, SideMenuItem
+menus_imported = time.perf_counter()
+items = [
+    SideMenuItem(
+        name=f"item_{i}",
+        label=f"Item {i}",
+        group=f"Group {i // 10}",
+        render=True,
+        sub_items=[SideMenuItem(name=f"item_{i}_{j}", label=f"Sub item {j}") for j in range(5)],
+    )
+    for i in range(100)
+]
+side_menu = SideMenu(items=items)
+state = side_menu.new_state()
+side_menu.enable_subitems("item_0", state=state)
+side_menu.get_width(state)
+side_menu.get_nav_content(None, state=state)
+rendered = time.perf_counter()
+print(json.dumps({
+    "import_wave_ms": (wave_imported - start) * 1000,
+    "import_menus_ms": (menus_imported - wave_imported) * 1000,
+    "first_render_ms": (rendered - menus_imported) * 1000,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "numpy_loaded": "numpy" in sys.modules,
+}))
+"""
+
+
+def run_once() -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, str(ROOT)], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh processes to measure")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if menus import takes longer")
+    parser.add_argument(
+        "--max-first-render-ms", type=float, help="Fail if first render takes longer"
+    )
+    parser.add_argument("--output", help="Write the results as JSON into this file")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    results = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("import_wave_ms", "import_menus_ms", "first_render_ms", "max_rss_kb")
+    }
+    results["numpy_loaded"] = any(run["numpy_loaded"] for run in runs)
+    results["runs"] = args.runs
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report)
+
+    failed = []
+    if args.max_import_ms is not None and results["import_menus_ms"] > args.max_import_ms:
+        failed.append(f"import_menus_ms {results['import_menus_ms']:.1f} > {args.max_import_ms}")
+    if (
+        args.max_first_render_ms is not None
+        and results["first_render_ms"] > args.max_first_render_ms
+    ):
+        failed.append(
+            f"first_render_ms {results['first_render_ms']:.1f} > {args.max_first_render_ms}"
+        )
+    if failed:
+        sys.exit("Startup regression: " + ", ".join(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,10 @@
-from pathlib import Path
 from typing import List
 
 from h2o_wave import Q, app, main, ui  # noqa F401
 
-from menus import SideMenu, SideMenuItem
+from menus import PageRegistry, SideMenu, SideMenuItem, publish_stylesheet
 
 app_layoutsize: str = "1000px"  # Change this to change the size of the layout
-stylesheet = ui.InlineStylesheet(
-    Path("common.css").read_text()
-)  # CSS file for styling. Spefically for spacing between different nav_groups without group names
 
 
 side_menu_items: List[SideMenuItem] = [
@@ -45,6 +41,14 @@ side_menu_items: List[SideMenuItem] = [
 
 async def update_app_layout(q: Q):
     """Update the app layout based on the state of the side menu"""
+    state = q.client.side_menu_state
+    if not q.app.side_menu.layout_changed(state):
+        return  # Width of the side menu is the same, no need to send the layout again
+    if q.client.layout_rendered:
+        # Only the size of the sidebar zone changes
+        q.page["meta"].layouts[0].zones[1].zones[0].size = q.app.side_menu.get_width(state)
+        return
+
     app_layout = ui.layout(
         breakpoint=app_layoutsize,
         width=app_layoutsize,
@@ -54,7 +58,9 @@ async def update_app_layout(q: Q):
                 name="main",
                 direction=ui.ZoneDirection.ROW,
                 zones=[
-                    q.app.side_menu.layout,  # Sidemenu layout info changes based on the state of collapsed or not
+                    q.app.side_menu.get_layout(
+                        state
+                    ),  # Sidemenu layout info changes based on the state of collapsed or not
                     ui.zone("main_body"),
                 ],
             ),
@@ -65,8 +71,11 @@ async def update_app_layout(q: Q):
         box="",
         title="Side-menu Tutorial",
         layouts=[app_layout],
-        stylesheet=stylesheet,
+        # CSS shipped with SideMenu, for spacing between nav_groups without group names. Linked instead of
+        # inlined, so it's uploaded once and cached by the browser.
+        stylesheets=[await publish_stylesheet(q)],
     )
+    q.client.layout_rendered = True
 
 
 async def init_app(q: Q):
@@ -74,88 +83,81 @@ async def init_app(q: Q):
     if q.app.initialised:
         return
     q.app.side_menu = SideMenu(items=side_menu_items, collapsable=True, disable_group_names=True)
-    q.app.active_page = "home"
+    q.app.pages = PageRegistry(q.app.side_menu, ttl=60)  # Built cards are kept for a minute
+    q.app.pages.register("home", home_page)
+    q.app.pages.register("about", about_page)
+    q.app.pages.register("subpage", subpage)
+    q.app.pages.register("subpage2", subpage2)
     q.app.initialised = True
 
 
+async def init_client(q: Q):
+    """Initialise the client. SideMenu state is kept per client, the menu itself is shared"""
+    if q.client.initialised:
+        return
+    q.client.side_menu_state = q.app.side_menu.new_state()
+    q.client.active_page = "home"
+    q.client.initialised = True
+
+
 async def handle_args(q: Q):
     """Handle the arguments passed to the app"""
-    if q.args["side_menu_toggle_collapse"]:
-        q.app.side_menu.toggle_state()
-    elif q.args["subpage"]:
-        q.app.side_menu.disable_subitems()
-        root_item = q.app.side_menu.get_root_item("subpage")
-        q.app.side_menu.enable_subitems(root_item.name)
-        q.app.side_menu.active_root_item = root_item
-        q.app.side_menu.expand_root_item = True
-        q.app.active_page = "subpage"
-    elif q.args["subpage2"]:
-        q.app.side_menu.disable_subitems()
-        root_item = q.app.side_menu.get_root_item("subpage2")
-        q.app.side_menu.enable_subitems(root_item.name)
-        q.app.side_menu.active_root_item = root_item
-        q.app.side_menu.expand_root_item = True
-        q.app.active_page = "subpage2"
-    elif q.args["home"]:
-        q.app.side_menu.expand_root_item = False
-        q.app.side_menu.active_root_item = q.app.side_menu.get_item("home")
-        q.app.side_menu.disable_subitems()
-        q.app.active_page = "home"
-    elif q.args["about"]:
-        q.app.side_menu.expand_root_item = False
-        q.app.side_menu.active_root_item = q.app.side_menu.get_item("about")
-        q.app.side_menu.disable_subitems()
-        q.app.active_page = "about"
+    active_page = await q.app.side_menu.handle_click(q, q.client.side_menu_state)
+    if active_page:
+        q.client.active_page = active_page
 
 
 async def render_sidemenu(q: Q):
-    """Render the side menu"""
-    q.page["sidemenu"] = ui.nav_card(
-        box=ui.box(zone="sidebar", width=q.app.side_menu.width, height=q.app.side_menu.height),
-        items=q.app.side_menu.get_nav_content(q=q),
-        value=q.app.active_page,
+    """Render the side menu. Only the changes since the last render are sent"""
+    q.app.side_menu.render(q, q.client.side_menu_state, value=q.client.active_page)
+
+
+def home_page():
+    return ui.form_card(
+        box=ui.box(zone="main_body", height="500px"),
+        items=[
+            ui.text("<h3 style='font-size:1.5vw'>Welcome to Collapsable SideMenu tutorial!</h3>"),
+            ui.buttons(
+                items=[
+                    ui.button(name="subpage", label="Open Subpage", primary=True),
+                    ui.button(name="subpage2", label="Open Subpage 2", primary=True),
+                ]
+            ),
+        ],
     )
 
 
+def about_page():
+    return ui.form_card(
+        box=ui.box(zone="main_body", height="500px"),
+        items=[ui.text("SideMenu object can be used only in H2O Wave projects")],
+    )
+
+
+async def subpage():
+    # Page builders can be async, e.g. to run queries. Subpages are prebuilt when Home is expanded.
+    return ui.form_card(box=ui.box(zone="main_body", height="500px"), items=[ui.text("Subpage")])
+
+
+async def subpage2():
+    return ui.form_card(box=ui.box(zone="main_body", height="500px"), items=[ui.text("Subpage 2")])
+
+
 async def render_cards(q: Q):
-    """Render the cards based on the active page"""
-    if q.app.active_page == "home":
-        q.page["example"] = ui.form_card(
-            box=ui.box(zone="main_body", height="500px"),
-            items=[
-                ui.text(
-                    "<h3 style='font-size:1.5vw'>Welcome to Collapsable SideMenu tutorial!</h3>"
-                ),
-                ui.buttons(
-                    items=[
-                        ui.button(name="subpage", label="Open Subpage", primary=True),
-                        ui.button(name="subpage2", label="Open Subpage 2", primary=True),
-                    ]
-                ),
-            ],
-        )
-    elif q.app.active_page == "about":
-        q.page["example"] = ui.form_card(
-            box=ui.box(zone="main_body", height="500px"),
-            items=[ui.text("SideMenu object can be used only in H2O Wave projects")],
-        )
-    elif q.app.active_page == "subpage":
-        q.page["example"] = ui.form_card(
-            box=ui.box(zone="main_body", height="500px"), items=[ui.text("Subpage")]
-        )
-    elif q.app.active_page == "subpage2":
-        q.page["example"] = ui.form_card(
-            box=ui.box(zone="main_body", height="500px"), items=[ui.text("Subpage 2")]
-        )
+    """Render the card of the active page. Cards are built once and sent only when the active page changes"""
+    await q.app.pages.render(q, q.client.active_page, q.client.side_menu_state, card_name="example")
 
 
 @app("/demo")
 async def serve(q: Q):
     """Main app function"""
-    print(f"q.args: {q.args}")  # Logging
     await init_app(q)
+    await init_client(q)
     await handle_args(q)
-    await update_app_layout(q)
-    await render_sidemenu(q)
-    await render_cards(q)
-    await q.page.save()
+    # Held until the page is saved, so a broadcast doesn't send changes between the render and the save
+    async with q.client.side_menu_state.lock:
+        await update_app_layout(q)
+        await render_sidemenu(q)
+        await render_cards(q)
+        with q.app.side_menu.instrumentation.phase("page_save"):
+            await q.page.save()
@@ -1,14 +1,10 @@
-from pathlib import Path
 from typing import List
 
 from h2o_wave import Q, app, main, ui  # noqa F401
 
-from menus import SideMenu, SideMenuItem
+from menus import SideMenu, SideMenuItem, publish_stylesheet
 
 app_layoutsize: str = "1000px"  # Change this to change the size of the layout
-stylesheet = ui.InlineStylesheet(
-    Path("common.css").read_text()
-)  # CSS file for styling. Spefically for spacing between different nav_groups without group names
 
 side_menu_items: List[SideMenuItem] = [
     SideMenuItem(
@@ -42,8 +38,16 @@ side_menu_items: List[SideMenuItem] = [
 ]
 
 
-async def update_app_layout(q: Q):
-    """Update the app layout based on the state of the side menu"""
+async def update_app_layout(q: Q) -> bool:
+    """Update the app layout based on the state of the side menu. Returns True if the layout was changed"""
+    state = q.client.side_menu_state
+    if not q.app.side_menu.layout_changed(state):
+        return False  # Width of the side menu is the same, no need to send the layout again
+    if q.client.layout_rendered:
+        # Only the size of the sidebar zone changes
+        q.page["meta"].layouts[0].zones[1].zones[0].size = q.app.side_menu.get_width(state)
+        return True
+
     app_layout = ui.layout(
         breakpoint=app_layoutsize,
         width=app_layoutsize,
@@ -53,7 +57,9 @@ async def update_app_layout(q: Q):
                 name="main",
                 direction=ui.ZoneDirection.ROW,
                 zones=[
-                    q.app.side_menu.layout,  # Sidemenu layout info changes based on the state of collapsed or not
+                    q.app.side_menu.get_layout(
+                        state
+                    ),  # Sidemenu layout info changes based on the state of collapsed or not
                     ui.zone("main_body"),
                 ],
             ),
@@ -64,41 +70,53 @@ async def update_app_layout(q: Q):
         box="",
         title="Side-menu Tutorial",
         layouts=[app_layout],
-        stylesheet=stylesheet,
+        # CSS shipped with SideMenu, for spacing between nav_groups without group names. Linked instead of
+        # inlined, so it's uploaded once and cached by the browser.
+        stylesheets=[await publish_stylesheet(q)],
     )
+    q.client.layout_rendered = True
+    return True
 
 
 async def init_app(q: Q):
     """Initialise the app"""
     if q.app.initialised:
         return
-    q.app.side_menu = SideMenu(items=side_menu_items, collapsable=True, disable_group_names=True)
-    q.app.active_page = "home"
+    q.app.side_menu = SideMenu(
+        items=side_menu_items,
+        collapsable=True,
+        disable_group_names=True,
+    )  # Pass coalesce_delay to render rapid clicks of a client once, at the cost of delaying every click
     q.app.initialised = True
 
 
+async def init_client(q: Q):
+    """Initialise the client. SideMenu state is kept per client, the menu itself is shared"""
+    if q.client.initialised:
+        return
+    q.client.side_menu_state = q.app.side_menu.new_state()
+    q.client.active_page = "home"
+    q.client.initialised = True
+
+
 async def handle_args(q: Q):
     """Handle the arguments passed to the app"""
-    if q.args["side_menu_toggle_collapse"]:
-        q.app.side_menu.toggle_state()
-    elif q.args["home"]:
-        q.app.active_page = "home"
-    elif q.args["about"]:
-        q.app.active_page = "about"
-
-
-async def render_sidemenu(q: Q):
-    """Render the side menu"""
-    q.page["sidemenu"] = ui.nav_card(
-        box=ui.box(zone="sidebar", width=q.app.side_menu.width, height=q.app.side_menu.height),
-        items=q.app.side_menu.get_nav_content(q=q),
-        value=q.app.active_page,
-    )
+    active_page = await q.app.side_menu.handle_click(q, q.client.side_menu_state)
+    if active_page:
+        q.client.active_page = active_page
+
+
+async def render_sidemenu(q: Q) -> bool:
+    """Render the side menu. Only the changes since the last render are sent"""
+    return q.app.side_menu.render(q, q.client.side_menu_state, value=q.client.active_page)
 
 
-async def render_cards(q: Q):
-    """Render the cards based on the active page"""
-    if q.app.active_page == "home":
+async def render_cards(q: Q) -> bool:
+    """Render the cards based on the active page, if it changed since the last render"""
+    if q.client.active_page == q.client.rendered_page:
+        return False
+    q.client.rendered_page = q.client.active_page
+    if q.client.active_page == "home":
         q.page["example"] = ui.form_card(
             box=ui.box(zone="main_body", height="500px"),
             items=[
@@ -107,20 +125,28 @@ async def render_cards(q: Q):
                 ),
             ],
         )
-    elif q.app.active_page == "about":
+    elif q.client.active_page == "about":
         q.page["example"] = ui.form_card(
             box=ui.box(zone="main_body", height="500px"),
             items=[ui.text("SideMenu object can be used only in H2O Wave projects")],
         )
+    return True
 
 
 @app("/demo")
 async def serve(q: Q):
     """Main app function"""
-    print(f"q.args: {q.args}")  # Logging
     await init_app(q)
+    await init_client(q)
     await handle_args(q)
-    await update_app_layout(q)
-    await render_sidemenu(q)
-    await render_cards(q)
-    await q.page.save()
+    if not await q.app.side_menu.coalesce(q.client.side_menu_state):
+        return  # A later click of the client renders the final state
+    # Held until the page is saved, so a broadcast doesn't send changes between the render and the save
+    async with q.client.side_menu_state.lock:
+        layout_changed = await update_app_layout(q)
+        sidemenu_changed = await render_sidemenu(q)
+        cards_changed = await render_cards(q)
+        if not (layout_changed or sidemenu_changed or cards_changed):
+            return  # e.g. the collapse button was clicked twice, nothing to send
+        with q.app.side_menu.instrumentation.phase("page_save"):
+            await q.page.save()
@@ -0,0 +1,34 @@
+from .badges import BadgeUpdater
+from .definition import dump_definition, load_definition, load_menu, save_menu
+from .instrumentation import HistogramSink, Instrumentation, LoggingSink, NullInstrumentation
+from .pages import PageRegistry
+from .search import SearchIndex, SearchMatch
+from .shared import SharedMenuTree, open_shared, save_shared
+from .side_menu import SideMenu, SideMenuItem, SideMenuItemView, SideMenuState, glyph_width
+from .stylesheet import STYLESHEET_PATH, publish_stylesheet, stylesheet_filename
+
+__all__ = [
+    "BadgeUpdater",
+    "HistogramSink",
+    "Instrumentation",
+    "LoggingSink",
+    "NullInstrumentation",
+    "PageRegistry",
+    "STYLESHEET_PATH",
+    "SearchIndex",
+    "SearchMatch",
+    "SharedMenuTree",
+    "SideMenu",
+    "SideMenuItem",
+    "SideMenuItemView",
+    "SideMenuState",
+    "dump_definition",
+    "glyph_width",
+    "load_definition",
+    "load_menu",
+    "open_shared",
+    "publish_stylesheet",
+    "save_menu",
+    "save_shared",
+    "stylesheet_filename",
+]
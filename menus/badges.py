@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Union
+
+from .side_menu import SideMenu
+
+logger = logging.getLogger(__name__)
+
+# Returns the badge of an item, or badges of many items as a dict (name -> badge) for sources added without a name.
+Source = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class _Watch:
+    __slots__ = ("name", "source", "interval", "refreshed_at")
+
+    def __init__(self, name: Optional[str], source: Source, interval: Optional[float]):
+        self.name = name  # Item the badge is of, None if the source returns a dict of badges.
+        self.source = source
+        self.interval = interval  # Seconds between calls, None to call it on each refresh.
+        self.refreshed_at: float = float("-inf")  # Monotonic time of the last call.
+
+
+class BadgeUpdater:
+    """Keeps the badges of SideMenu items up-to-date from (async) sources, e.g. queue lengths or unread counts.
+    Sources are called in a background task every interval seconds. Changed badges of all the sources are set
+    together and sent once per refresh with SideMenu.broadcast, to the clients showing the changed items only."""
+
+    def __init__(self, side_menu: SideMenu, interval: float = 1.0, max_concurrency: int = 64):
+        self.side_menu = side_menu  # SideMenu whose items get the badges.
+        self.interval = interval  # Seconds between refreshes.
+        self.max_concurrency = max_concurrency  # Max number of pages saved at a time.
+        self._watches: List[_Watch] = []
+        self._task: Optional[asyncio.Future] = None  # Background task running the refreshes.
+
+    def add(self, source: Source, name: Optional[str] = None, interval: Optional[float] = None):
+        """Adds a source of the badge of the item, or of badges of many items (name -> badge) if no name is passed.
+        If interval is passed, the source is called at most once per interval seconds."""
+        self._watches.append(_Watch(name, source, interval))
+
+    def remove(self, source: Source):
+        """Removes the source. Badges it set are kept"""
+        self._watches = [watch for watch in self._watches if watch.source is not source]
+
+    def start(self):
+        """Starts refreshing the badges in the background. Must be called from a running event loop,
+        e.g. when the app is initialised"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        """Stops refreshing the badges"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Refreshing side menu badges failed")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def refresh(self) -> int:
+        """Calls the sources due, sets the changed badges and sends them to the clients showing the items.
+        Returns the number of clients updated."""
+        with self.side_menu.instrumentation.phase("badge_refresh"):
+            now = time.monotonic()
+            due = [
+                watch
+                for watch in self._watches
+                if watch.interval is None or now - watch.refreshed_at >= watch.interval
+            ]
+            for watch in due:
+                watch.refreshed_at = now
+            results = await asyncio.gather(
+                *(self._call(watch.source) for watch in due), return_exceptions=True
+            )
+
+            badges: Dict[str, Any] = {}
+            for watch, result in zip(due, results):
+                if isinstance(result, Exception):
+                    logger.warning("Side menu badge source failed: %s", result)
+                    self.side_menu.instrumentation.count("badge_errors")
+                elif watch.name is not None:
+                    badges[watch.name] = result
+                elif not isinstance(result, Mapping):
+                    logger.warning(
+                        "Side menu badge source without a name returned %s, not a dict of badges",
+                        type(result).__name__,
+                    )
+                    self.side_menu.instrumentation.count("badge_errors")
+                else:
+                    badges.update(result)
+
+            # Only the groups of the changed items are rendered again
+            changed = self.side_menu.set_badges(badges)
+        self.side_menu.instrumentation.count("badge_updates", len(changed))
+        if not changed:
+            return 0
+        return await self.side_menu.broadcast(self.max_concurrency)
+
+    @staticmethod
+    async def _call(source: Source) -> Any:
+        result = source()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
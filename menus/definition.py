@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+import pickle
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .side_menu import SideMenu, SideMenuItem
+
+FORMAT_VERSION: int = 2  # Incremented when the layout of the definition changes.
+_FIELDS = ("name", "label", "group", "icon", "expanded_icon", "disabled", "expand_always", "render")
+
+
+def _label_width_name(side_menu: SideMenu) -> Optional[str]:
+    """Returns the name of the label width function, None if it can't identify the function"""
+    name = getattr(side_menu._label_width, "__qualname__", None)
+    if name is None or "<" in name:
+        return None  # Lambdas and local functions can't be told apart by their names
+    return f"{getattr(side_menu._label_width, '__module__', None)}.{name}"
+
+
+def dump_definition(side_menu: SideMenu) -> Dict[str, Any]:
+    """Returns the menu definition as a dict of plain values, with the indexes precomputed.
+    Items are stored in depth first order as columns: a list per field, the sorted role names and the positions of
+    the parents. Sub items providers and role predicates can't be stored, ValueError is raised for such items."""
+    columns: Dict[str, list] = {key: [] for key in _FIELDS + ("roles", "parent")}
+    positions: Dict[str, int] = {}
+    badged = False  # Widths include the badges, which aren't saved
+
+    def add(item: SideMenuItem, parent: Optional[int]):
+        nonlocal badged
+        if item.sub_items_provider is not None:
+            raise ValueError(
+                f"SideMenuItem {item.name!r} has a sub_items_provider, which can't be saved"
+            )
+        if callable(item.roles):
+            raise ValueError(
+                f"SideMenuItem {item.name!r} has a roles predicate, which can't be saved"
+            )
+        badged = badged or item.badge is not None
+        position = positions[item.name] = len(positions)
+        for key in _FIELDS:
+            columns[key].append(getattr(item, key))
+        columns["roles"].append(None if item.roles is None else sorted(item.roles))
+        columns["parent"].append(parent)
+        for sub_item in item.sub_items:
+            add(sub_item, position)
+
+    for item in side_menu.items:
+        add(item, None)
+
+    return dict(
+        format=FORMAT_VERSION,
+        options=dict(
+            collapsed=side_menu._start_collapsed,
+            collapsable=side_menu.collapsable,
+            disable_group_names=side_menu.disable_group_names,
+            auto_width=side_menu.auto_width,
+            documentation=side_menu.documentation,
+        ),
+        # Without a label width, widths are measured again when loaded, leaving out the badges
+        label_width=_label_width_name(side_menu) if not badged else None,
+        items=columns,
+        groups=[  # Group order and positions of the top-level items of each group.
+            [group, [positions[item.name] for item in items]]
+            for group, items in side_menu._groups.items()
+        ],
+        widths=[side_menu._rendered_widths.get(name) for name in columns["name"]],
+        children_widths=[
+            [positions[name], width] for name, width in side_menu._children_widths.items()
+        ],
+    )
+
+
+def load_definition(definition: Dict[str, Any], **options) -> SideMenu:
+    """Returns a SideMenu built from a definition returned by dump_definition.
+    Options override the SideMenu arguments stored in the definition.
+    Precomputed indexes are used as they are, unless the definition was saved with a different label_width."""
+    if definition.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported SideMenu definition format: {definition.get('format')!r}")
+    side_menu = SideMenu(**{**definition["options"], **options})
+
+    columns = dict(definition["items"])
+    columns.setdefault("roles", [None] * len(columns["name"]))  # Saved before items had roles
+    for key in ("group", "icon", "expanded_icon"):  # Repeated in many items, share a single copy
+        columns[key] = [
+            sys.intern(value) if isinstance(value, str) else value for value in columns[key]
+        ]
+
+    new_item = SideMenuItem.__new__
+    init = object.__setattr__  # Items are attached to the menu below, nothing to notify
+    items: List[SideMenuItem] = []
+    roots: List[SideMenuItem] = []
+    for (
+        name,
+        label,
+        group,
+        icon,
+        expanded_icon,
+        disabled,
+        expand_always,
+        render,
+        roles,
+        parent,
+    ) in zip(*(columns[key] for key in _FIELDS + ("roles", "parent"))):
+        item = new_item(SideMenuItem)
+        init(item, "_menus", ())
+        init(item, "name", name)
+        init(item, "label", label)
+        init(item, "group", group)
+        init(item, "icon", icon)
+        init(item, "expanded_icon", expanded_icon)
+        init(item, "disabled", disabled)
+        init(item, "expand_always", expand_always)
+        init(item, "render", render)
+        init(item, "sub_items", ())
+        init(item, "sub_items_provider", None)
+        init(item, "sub_items_ttl", None)
+        init(item, "roles", None if roles is None else frozenset(roles))
+        init(item, "badge", None)  # Badges are live values, not saved
+        if parent is None:
+            roots.append(item)
+        elif items[parent].sub_items:
+            items[parent].sub_items.append(item)
+        else:
+            init(items[parent], "sub_items", [item])
+        items.append(item)
+
+    label_width = definition.get("label_width")
+    if label_width is None or label_width != _label_width_name(side_menu):
+        side_menu.items = roots  # Widths depend on the label width function, reindex from scratch
+        return side_menu
+
+    side_menu._restore(
+        roots,
+        index={item.name: item for item in items},
+        parents={
+            item.name: items[parent]
+            for item, parent in zip(items, columns["parent"])
+            if parent is not None
+        },
+        groups={
+            group: [items[position] for position in positions]
+            for group, positions in definition["groups"]
+        },
+        rendered_widths={
+            item.name: width
+            for item, width in zip(items, definition["widths"])
+            if width is not None
+        },
+        children_widths={
+            items[position].name: width for position, width in definition["children_widths"]
+        },
+    )
+    if len(side_menu._index) != len(items):
+        raise ValueError("Duplicate SideMenuItem names in the SideMenu definition")
+    return side_menu
+
+
+def save_menu(side_menu: SideMenu, path: Union[str, Path]):
+    """Saves the menu definition into the file. Files with a .json suffix are written as JSON,
+    others are pickled. Both store the same columns and load in about the same time."""
+    path = Path(path)
+    definition = dump_definition(side_menu)
+    if path.suffix == ".json":
+        path.write_text(json.dumps(definition, separators=(",", ":")))
+    else:
+        path.write_bytes(pickle.dumps(definition, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def load_menu(path: Union[str, Path], **options) -> SideMenu:
+    """Loads a SideMenu from a file written by save_menu. Options override the stored SideMenu arguments.
+    Pickled files must only be loaded from trusted sources."""
+    path = Path(path)
+    if path.suffix == ".json":
+        definition = json.loads(path.read_text())
+    else:
+        definition = pickle.loads(path.read_bytes())
+    return load_definition(definition, **options)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import logging
+import math
+import time
+from typing import Dict, List, Optional
+
+
+class HistogramSink:
+    """Keeps timings in memory as histograms with power of two microsecond buckets, and counters as totals"""
+
+    def __init__(self):
+        self.timings: Dict[str, Dict] = {}  # Phase -> count, total, min, max and bucket counts.
+        self.counters: Dict[str, int] = {}  # Counter name -> total.
+
+    def timing(self, name: str, seconds: float):
+        histogram = self.timings.get(name)
+        if histogram is None:
+            histogram = self.timings[name] = dict(
+                count=0, total=0.0, min=math.inf, max=0.0, buckets={}
+            )
+        histogram["count"] += 1
+        histogram["total"] += seconds
+        histogram["min"] = min(histogram["min"], seconds)
+        histogram["max"] = max(histogram["max"], seconds)
+        # Bucket upper bound in microseconds: 1, 2, 4, 8, ...
+        bucket = 1 << max(0, math.ceil(math.log2(max(seconds * 1e6, 1))))
+        histogram["buckets"][bucket] = histogram["buckets"].get(bucket, 0) + 1
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def percentile(self, name: str, percent: float) -> Optional[int]:
+        """Returns the upper bound (microseconds) of the bucket the percentile falls into"""
+        histogram = self.timings.get(name)
+        if histogram is None:
+            return None
+        rank = histogram["count"] * percent / 100
+        seen = 0
+        for bucket in sorted(histogram["buckets"]):
+            seen += histogram["buckets"][bucket]
+            if seen >= rank:
+                return bucket
+        return None
+
+    def snapshot(self) -> Dict:
+        """Returns timings (in microseconds) and counters as a dict, e.g. to be dumped as JSON"""
+        return dict(
+            timings={
+                name: dict(
+                    count=histogram["count"],
+                    mean_us=histogram["total"] / histogram["count"] * 1e6,
+                    min_us=histogram["min"] * 1e6,
+                    max_us=histogram["max"] * 1e6,
+                    p50_us=self.percentile(name, 50),
+                    p99_us=self.percentile(name, 99),
+                )
+                for name, histogram in self.timings.items()
+            },
+            counters=dict(self.counters),
+        )
+
+    def reset(self):
+        self.timings.clear()
+        self.counters.clear()
+
+
+class LoggingSink:
+    """Logs each timing and counter as a structured record, with phase/counter and value in the extra fields"""
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = logger or logging.getLogger("menus")
+        self.level = level
+
+    def timing(self, name: str, seconds: float):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level,
+                "side_menu %s %.1fus",
+                name,
+                seconds * 1e6,
+                extra=dict(side_menu_phase=name, side_menu_seconds=seconds),
+            )
+
+    def count(self, name: str, value: int = 1):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level,
+                "side_menu %s +%d",
+                name,
+                value,
+                extra=dict(side_menu_counter=name, side_menu_value=value),
+            )
+
+
+class _Phase:
+    """Times the block into the sink"""
+
+    __slots__ = ("sink", "name", "start")
+
+    def __init__(self, sink, name: str):
+        self.sink = sink
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.sink.timing(self.name, time.perf_counter() - self.start)
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class Instrumentation:
+    """Records timings of the phases of the SideMenu request cycle and counters into the sinks.
+    Sinks implement timing(name, seconds) and count(name, value), e.g. HistogramSink or LoggingSink."""
+
+    enabled: bool = True
+
+    def __init__(self, *sinks):
+        self.sinks: List = list(sinks)
+
+    def phase(self, name: str):
+        """Returns a context manager timing the block as the phase"""
+        return _Phase(self, name)
+
+    def timing(self, name: str, seconds: float):
+        for sink in self.sinks:
+            sink.timing(name, seconds)
+
+    def count(self, name: str, value: int = 1):
+        for sink in self.sinks:
+            sink.count(name, value)
+
+
+class NullInstrumentation(Instrumentation):
+    """Records nothing. Default instrumentation of the SideMenu, costs a method call per phase"""
+
+    enabled: bool = False
+
+    def __init__(self):
+        super().__init__()
+
+    def phase(self, name: str):
+        return _NULL_PHASE
+
+    def timing(self, name: str, seconds: float):
+        pass
+
+    def count(self, name: str, value: int = 1):
+        pass
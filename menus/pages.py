@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple, Union
+
+from h2o_wave import Q
+
+from .side_menu import SideMenu, SideMenuState
+
+logger = logging.getLogger(__name__)
+
+# Returns the card of a page, e.g. a ui.form_card.
+Builder = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class PageRegistry:
+    """Cards of the pages opened from a SideMenu, built by a (async) builder registered per item name.
+    Built cards are shared by all the clients and kept for ttl seconds (forever if None), at most max_size of them
+    (least recently used are dropped). Cards of the sub items of an expanded item are built in the background,
+    so clicking one of them renders without waiting for its builder."""
+
+    def __init__(
+        self,
+        side_menu: SideMenu,
+        max_size: int = 128,
+        ttl: Optional[float] = None,
+        prefetch: bool = True,
+    ):
+        self.side_menu = side_menu  # SideMenu whose item names are the page names.
+        self.max_size = max_size  # Max number of built cards kept (LRU).
+        self.ttl = ttl  # Default seconds to keep a built card, None keeps it until it's dropped or invalidated.
+        self.prefetch = prefetch  # If True, cards of the sub items of the expanded active root item are prebuilt.
+        self._builders: Dict[str, Tuple[Builder, Optional[float]]] = {}  # Name -> builder, ttl.
+        self._cards: OrderedDict = OrderedDict()  # Name -> (time built, card).
+        self._building: Dict[str, asyncio.Future] = {}  # Name -> card being built.
+        self._tasks: Set[asyncio.Future] = set()  # Prefetches running in the background.
+
+    def register(self, name: str, builder: Builder, ttl: Optional[float] = None):
+        """Registers the builder of the page of the item. ttl overrides the default ttl of the registry"""
+        self._builders[name] = (builder, ttl if ttl is not None else self.ttl)
+        self.invalidate(name)
+
+    def page(self, name: str, ttl: Optional[float] = None) -> Callable[[Builder], Builder]:
+        """Decorator registering the builder of the page of the item"""
+
+        def decorator(builder: Builder) -> Builder:
+            self.register(name, builder, ttl)
+            return builder
+
+        return decorator
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._builders
+
+    def invalidate(self, *names: str):
+        """Drops the built cards of the pages, all of them if no names are passed. They are built again when needed"""
+        if names:
+            for name in names:
+                self._cards.pop(name, None)
+        else:
+            self._cards.clear()
+
+    def _cached(self, name: str) -> Optional[Any]:
+        """Returns the built card of the page if it hasn't expired"""
+        cached = self._cards.get(name)
+        if cached is None:
+            return None
+        built_at, card = cached
+        ttl = self._builders[name][1]
+        if ttl is not None and time.monotonic() - built_at >= ttl:
+            del self._cards[name]
+            return None
+        self._cards.move_to_end(name)
+        return card
+
+    async def get(self, name: str) -> Optional[Any]:
+        """Returns the card of the page, built if it isn't cached or expired. None for names without a builder.
+        Concurrent calls for the same page wait for the same build."""
+        if name not in self._builders:
+            return None
+        card = self._cached(name)
+        if card is not None:
+            self.side_menu.instrumentation.count("page_cache_hits")
+            return card
+
+        building = self._building.get(name)
+        if building is None:
+            self.side_menu.instrumentation.count("page_cache_misses")
+            building = asyncio.ensure_future(self._build(name))
+            self._building[name] = building
+            building.add_done_callback(lambda _: self._building.pop(name, None))
+        # A cancelled request doesn't cancel a build shared with other requests
+        return await asyncio.shield(building)
+
+    async def _build(self, name: str) -> Any:
+        with self.side_menu.instrumentation.phase("page_build"):
+            card = self._builders[name][0]()
+            if inspect.isawaitable(card):
+                card = await card
+        self._cards[name] = (time.monotonic(), card)
+        self._cards.move_to_end(name)
+        if len(self._cards) > self.max_size:
+            self._cards.popitem(last=False)
+        return card
+
+    async def render(
+        self, q: Q, name: str, state: Optional[SideMenuState] = None, card_name: str = "page"
+    ) -> bool:
+        """Sets the card of the page into q.page, unless the client already has the same card under card_name.
+        Cards of the rendered sub items of the expanded active root item are prefetched.
+        Returns True if the card was set into the page."""
+        if self.prefetch:  # Built while the card of the page is built
+            self._prefetch_sub_items(state or self.side_menu.state, name)
+        card = await self.get(name)
+        sent = q.client.side_menu_page_cards  # Card name -> card the client has.
+        if sent is None:
+            sent = q.client.side_menu_page_cards = {}
+        if card is None or sent.get(card_name) is card:
+            return False
+        q.page[card_name] = card
+        sent[card_name] = card
+        return True
+
+    def _prefetch_sub_items(self, state: SideMenuState, active_page: str):
+        """Starts building the cards of the rendered sub items of the active root item in the background"""
+        root = state.active_root
+        if root is None or root not in state.expanded:
+            return
+        item = self.side_menu.get_item(root)
+        if item is None:
+            return
+        for sub_item in item.sub_items:
+            name = sub_item.name
+            if (
+                name != active_page
+                and name in self._builders
+                and name not in self._building
+                and self._cached(name) is None
+                and self.side_menu.is_rendered(sub_item, state)
+            ):
+                self.side_menu.instrumentation.count("page_prefetches")
+                task = asyncio.ensure_future(self.get(name))
+                self._tasks.add(task)
+                task.add_done_callback(self._prefetched)
+
+    def _prefetched(self, task: asyncio.Future):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Prefetching a page failed: %s", task.exception())
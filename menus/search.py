@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, NamedTuple, Set
+
+from .side_menu import SideMenuItem
+
+
+class SearchMatch(NamedTuple):
+    """Item matching a search, returned by SideMenu.search"""
+
+    item: SideMenuItem
+    ancestors: List[SideMenuItem]  # Starting from the top-level ancestor.
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigram index over the labels and names of the items, for case insensitive substring search.
+    Queries shorter than 3 characters are matched against all the texts."""
+
+    def __init__(self, items: Iterable[SideMenuItem] = ()):
+        self._texts: Dict[str, str] = {}  # Name -> lower case label and name.
+        # Trigram -> names of the items with it in their text.
+        self._postings: Dict[str, Set[str]] = {}
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def add(self, item: SideMenuItem):
+        """Adds the item, without its sub items"""
+        text = self._texts[item.name] = f"{item.label}\n{item.name}".lower()
+        for trigram in _trigrams(text):
+            self._postings.setdefault(trigram, set()).add(item.name)
+
+    def remove(self, name: str):
+        text = self._texts.pop(name, None)
+        if text is None:
+            return
+        for trigram in _trigrams(text):
+            names = self._postings[trigram]
+            names.discard(name)
+            if len(names) == 0:
+                del self._postings[trigram]
+
+    def find(self, query: str) -> Set[str]:
+        """Returns names of the items whose label or name contains the query, ignoring case"""
+        query = query.lower()
+        trigrams = _trigrams(query)
+        if len(trigrams) == 0:
+            return {name for name, text in self._texts.items() if query in text}
+        postings = sorted((self._postings.get(trigram, set()) for trigram in trigrams), key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        return {name for name in candidates if query in self._texts[name]}
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import json
+import mmap
+from array import array
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .side_menu import SideMenu, SideMenuItem
+
+MAGIC: bytes = b"SMNU"
+FORMAT_VERSION: int = 1  # Incremented when the layout of the file changes.
+# Int32 fields of an item record. Strings are positions in the string table, -1 for None.
+# Children of an item are stored next to each other (breadth first order), starting at first_child.
+_RECORD = "name label group icon expanded_icon flags parent first_child children".split()
+_RECORD_SIZE = len(_RECORD)
+# Flags of an item. Eager: a descendant is always rendered, so sub items are created up front.
+_DISABLED, _EXPAND_ALWAYS, _RENDER, _EAGER = 1, 2, 4, 8
+_HEADER = 4 + 4 * 4  # Magic, version, item count, string count, options length.
+
+
+def save_shared(side_menu: SideMenu, path: Union[str, Path]):
+    """Writes the static parts of the menu (names, labels, icons, groups, flags and parent links)
+    into a file, which can be memory-mapped by open_shared.
+    Items with a sub_items_provider or roles can't be saved."""
+    items: List[SideMenuItem] = list(side_menu.items)
+    parents: List[int] = [-1] * len(items)
+    first_children: List[int] = []
+    for position, item in enumerate(items):  # Grows while iterating, breadth first
+        if item.sub_items_provider is not None:
+            raise ValueError(
+                f"SideMenuItem {item.name!r} has a sub_items_provider, which can't be saved"
+            )
+        if item.roles is not None:
+            raise ValueError(
+                f"SideMenuItem {item.name!r} has roles, which can't be saved in a shared file"
+            )
+        first_children.append(len(items))
+        items.extend(item.sub_items)
+        parents.extend([position] * len(item.sub_items))
+
+    strings: Dict[
+        str, int
+    ] = {}  # String -> position in the string table, repeated strings stored once
+
+    def string(value: Optional[str]) -> int:
+        return -1 if value is None else strings.setdefault(value, len(strings))
+
+    eager = [False] * len(items)
+    for position in range(len(items) - 1, 0, -1):  # Children come after their parents
+        if (items[position].render or eager[position]) and parents[position] >= 0:
+            eager[parents[position]] = True
+
+    records = array("i")
+    for position, item in enumerate(items):
+        flags = (
+            (_DISABLED if item.disabled else 0)
+            | (_EXPAND_ALWAYS if item.expand_always else 0)
+            | (_RENDER if item.render else 0)
+            | (_EAGER if eager[position] else 0)
+        )
+        records.extend(
+            (
+                string(item.name),
+                string(item.label),
+                string(item.group),
+                string(item.icon),
+                string(item.expanded_icon),
+                flags,
+                parents[position],
+                first_children[position],
+                len(item.sub_items),
+            )
+        )
+    if len({item.name for item in items}) < len(items):
+        raise ValueError("Duplicate SideMenuItem names in the SideMenu")
+
+    encoded = [value.encode() for value in strings]
+    names = array("i", sorted(range(len(items)), key=lambda i: encoded[records[i * _RECORD_SIZE]]))
+    offsets = array("i", [0])
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    options = json.dumps(
+        dict(
+            collapsed=side_menu._start_collapsed,
+            collapsable=side_menu.collapsable,
+            disable_group_names=side_menu.disable_group_names,
+            auto_width=side_menu.auto_width,
+            documentation=side_menu.documentation,
+        )
+    ).encode()
+    options += b" " * (-len(options) % 4)  # Int32 arrays after the options are kept aligned
+
+    header = array("i", (FORMAT_VERSION, len(items), len(strings), len(options)))
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(header.tobytes())
+        file.write(options)
+        file.write(records.tobytes())
+        file.write(names.tobytes())
+        file.write(offsets.tobytes())
+        file.write(b"".join(encoded))
+
+
+class SharedMenuTree:
+    """Read-only menu tree in a file written by save_shared, memory-mapped so that all the processes
+    opening the file share a single physical copy. Strings are decoded only for the items which are
+    looked up or materialized as SideMenuItems."""
+
+    def __init__(self, path: Union[str, Path]):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:4] != MAGIC:
+            raise ValueError(f"{path} is not a shared SideMenu file")
+        with memoryview(self._mmap) as buffer, buffer[4:_HEADER].cast("i") as header:
+            version, self._count, strings, options_length = header
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported shared SideMenu format: {version!r}")
+        self.options: Dict = json.loads(self._mmap[_HEADER : _HEADER + options_length])
+        start = _HEADER + options_length
+        self._buffer = ints = memoryview(self._mmap)[start:]  # Cast to int32 in slices below
+        self._records = ints[: self._count * _RECORD_SIZE * 4].cast("i")
+        start = self._count * _RECORD_SIZE * 4
+        self._names = ints[start : start + self._count * 4].cast("i")
+        start += self._count * 4
+        self._offsets = ints[start : start + (strings + 1) * 4].cast("i")
+        self._strings = ints[start + (strings + 1) * 4 :]
+        self._roots = next(
+            (i for i in range(self._count) if self._records[i * _RECORD_SIZE + 6] >= 0),
+            self._count,
+        )  # Top-level items come first
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        """Releases the mapping. Materialized items stay usable"""
+        for view in (self._records, self._names, self._offsets, self._strings, self._buffer):
+            view.release()
+        self._mmap.close()
+
+    def _string(self, position: int) -> Optional[str]:
+        if position < 0:
+            return None
+        return str(self._strings[self._offsets[position] : self._offsets[position + 1]], "utf-8")
+
+    def _name_bytes(self, position: int) -> memoryview:
+        string = self._records[position * _RECORD_SIZE]
+        return self._strings[self._offsets[string] : self._offsets[string + 1]]
+
+    def find(self, name: str) -> Optional[int]:
+        """Returns the position of the item, None if there is no item with the name.
+        Binary search over the names sorted in the file, nothing is loaded into memory."""
+        key = name.encode()
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name_bytes(self._names[middle]).tobytes() < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._name_bytes(self._names[low]) == key:
+            return self._names[low]
+        return None
+
+    def ancestors(self, name: str) -> List[str]:
+        """Returns names of the ancestors of the item, starting from its top-level ancestor"""
+        position = self.find(name)
+        names: List[str] = []
+        while position is not None:
+            position = self._records[position * _RECORD_SIZE + 6]
+            if position < 0:
+                break
+            names.append(self._string(self._records[position * _RECORD_SIZE]))  # type: ignore
+        return names[::-1]
+
+    def item(self, position: int) -> SideMenuItem:
+        """Returns a new SideMenuItem of the item at the position.
+        Sub items are created with it if one of them is always rendered, otherwise they are created
+        by its sub_items_provider when it's expanded."""
+        name, label, group, icon, expanded_icon, flags, _, first_child, children = self._records[
+            position * _RECORD_SIZE : (position + 1) * _RECORD_SIZE
+        ]
+        lazy = children > 0 and not flags & _EAGER
+        return SideMenuItem(
+            name=self._string(name),  # type: ignore
+            label=self._string(label),  # type: ignore
+            group=self._string(group),
+            icon=self._string(icon),
+            expanded_icon=self._string(expanded_icon),
+            disabled=bool(flags & _DISABLED),
+            expand_always=bool(flags & _EXPAND_ALWAYS),
+            render=bool(flags & _RENDER),
+            sub_items=None if lazy else self._items(first_child, children),
+            sub_items_provider=partial(self._items, first_child, children) if lazy else None,
+        )
+
+    def _items(self, start: int, count: int) -> List[SideMenuItem]:
+        return [self.item(position) for position in range(start, start + count)]
+
+    def roots(self) -> List[SideMenuItem]:
+        """Returns new SideMenuItems of the top-level items"""
+        return self._items(0, self._roots)
+
+
+def open_shared(path: Union[str, Path], **options) -> SideMenu:
+    """Opens a file written by save_shared as a SideMenu. Options override the saved arguments.
+    Only the top-level items (and the sub items always rendered) are created up front, sub items are
+    created from the shared file when their parent is expanded or one of them is clicked."""
+    tree = SharedMenuTree(path)
+    side_menu = SideMenu(items=tree.roots(), **{**tree.options, **options})
+    side_menu.item_source = tree
+    return side_menu
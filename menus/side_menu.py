@@ -0,0 +1,1965 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import inspect
+import json
+import logging
+import sys
+import time
+import unicodedata
+import weakref
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from h2o_wave import Q, expando_to_dict, ui
+from h2o_wave.core import AsyncPage
+from h2o_wave.types import Zone
+
+from .instrumentation import Instrumentation, NullInstrumentation
+
+if TYPE_CHECKING:
+    from .search import SearchIndex, SearchMatch
+    from .shared import SharedMenuTree
+
+logger = logging.getLogger(__name__)
+
+
+def glyph_width(label: str) -> int:
+    """Returns the display width of the label in narrow glyphs.
+    Wide glyphs (CJK, emoji) count as 2, combining marks and format characters (e.g. zero width joiner) as 0."""
+    width = 0
+    for char in label:
+        if unicodedata.category(char) in ("Mn", "Me", "Cf"):
+            continue
+        width += 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+    return width
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Interns repeated strings (groups, icons), so all the items share a single copy"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+Roles = Union[
+    Collection[str], Callable[[FrozenSet[str]], bool]
+]  # Role names or a predicate of the user's roles.
+
+
+def _roles(value: Optional[Roles]) -> Optional[Roles]:
+    """Returns role names as a frozenset, predicates as they are"""
+    return frozenset(value) if value is not None and not callable(value) else value
+
+
+class SideMenuItem:
+    """Item of a SideMenu. Slotted, since menus may have tens of thousands of items.
+    Groups and icons are interned, items without sub items share an empty tuple, so sub_items can't be
+    appended to: use SideMenu.add_item, or assign a new list."""
+
+    name: str  # wave attribute, name for handling click operations
+    label: str  # wave attribute, label to display
+    group: Optional[str]  # wave attribute, display items based on their groups
+    icon: Optional[str]  # wave attribute, icon to display
+    expanded_icon: Optional[str]  # expanded icon to display
+    disabled: Optional[bool]  # wave attribute
+    expand_always: Optional[bool]  # always expand and render sub items
+    render: Optional[bool]  # render item
+    sub_items: Sequence[SideMenuItem]  # assign sub items
+    # (async) callable returning sub items, called when the item is first expanded
+    sub_items_provider: Optional[Callable[[], Union[List, Awaitable[List]]]]
+    sub_items_ttl: Optional[float]  # seconds to keep provided sub items, None keeps them forever
+    roles: Optional[
+        Roles
+    ]  # roles the item (with its sub items) is shown to, or a predicate of the roles
+    badge: Optional[
+        Union[str, int]
+    ]  # status shown after the label, e.g. an unread count. None shows no badge
+    # Weak references to the SideMenus the item belongs to, notified when an attribute is set
+    _menus: Tuple[weakref.ref, ...]
+
+    __slots__ = (
+        "name",
+        "label",
+        "group",
+        "icon",
+        "expanded_icon",
+        "disabled",
+        "expand_always",
+        "render",
+        "sub_items",
+        "sub_items_provider",
+        "sub_items_ttl",
+        "roles",
+        "badge",
+        "_menus",
+    )
+    _fields = __slots__[:-1]
+
+    def __init__(
+        self,
+        name: str,
+        label: str,
+        group: Optional[str] = None,
+        icon: Optional[str] = "ChevronRightMed",
+        expanded_icon: Optional[str] = "ChevronDownMed",
+        disabled: Optional[bool] = False,
+        expand_always: Optional[bool] = False,
+        render: Optional[bool] = False,
+        sub_items: Optional[Sequence[SideMenuItem]] = None,
+        sub_items_provider: Optional[Callable[[], Union[List, Awaitable[List]]]] = None,
+        sub_items_ttl: Optional[float] = None,
+        roles: Optional[Roles] = None,
+        badge: Optional[Union[str, int]] = None,
+    ):
+        init = object.__setattr__  # Nothing to notify yet
+        init(self, "_menus", ())
+        init(self, "name", name)
+        init(self, "label", label)
+        init(self, "group", _intern(group))
+        init(self, "icon", _intern(icon))
+        init(self, "expanded_icon", _intern(expanded_icon))
+        init(self, "disabled", disabled)
+        init(self, "expand_always", expand_always)
+        init(self, "render", render)
+        init(self, "sub_items", sub_items if sub_items else ())
+        init(self, "sub_items_provider", sub_items_provider)
+        init(self, "sub_items_ttl", sub_items_ttl)
+        init(self, "roles", _roles(roles))
+        init(self, "badge", badge)
+
+    def __setattr__(self, key: str, value: Any):
+        if key in ("group", "icon", "expanded_icon"):
+            value = _intern(value)
+        elif key == "roles":
+            value = _roles(value)
+        old_value = getattr(self, key, None)
+        object.__setattr__(self, key, value)
+        # Let the SideMenus, which the item belongs to, know about the change
+        for owner in self._menus:
+            menu = owner()
+            if menu is not None:
+                menu._item_changed(self, key, old_value)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Copies and pickles don't belong to the SideMenus of the item"""
+        return {key: getattr(self, key) for key in self._fields}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        object.__setattr__(self, "_menus", ())
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self._fields)
+
+    __hash__ = None  # type: ignore  # Mutable, same as the dataclass it replaces
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self._fields)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class SideMenuItemView(NamedTuple):
+    """Display values of a SideMenuItem for a state, returned by SideMenu.render_group_items"""
+
+    name: str
+    label: str
+    icon: Optional[str]
+    disabled: Optional[bool]
+    group: Optional[str]
+
+
+class SideMenuState:
+    """State of a SideMenu for a single client.
+    The menu definition (SideMenuItem tree) is shared, so only this small record is kept per client."""
+
+    __slots__ = (
+        "collapsed",
+        "active_root",
+        "expanded",
+        "sent_items",
+        "sent_width",
+        "sent_value",
+        "sent_layout_width",
+        "page",
+        "card_name",
+        "window_start",
+        "window_item",
+        "filter",
+        "roles",
+        "events",
+        "event_at",
+        "_lock",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        collapsed: bool = False,
+        active_root: Optional[str] = None,
+        expanded: Optional[Set[str]] = None,
+        roles: Collection[str] = (),
+    ):
+        self.collapsed = collapsed  # If True, side-menu is rendered collapsed.
+        self.active_root = active_root  # Name of the active root item.
+        self.expanded: Set[str] = (
+            expanded if expanded is not None else set()
+        )  # Names of the expanded items. Sub items of these items are rendered.
+        # What was last sent to the client by SideMenu.render and SideMenu.layout_changed.
+        # Set sent_items to None to send the whole nav card again.
+        self.sent_items: Optional[list] = None
+        self.sent_width: Optional[str] = None
+        self.sent_value: Optional[str] = None
+        self.sent_layout_width: Optional[str] = None
+        self.page: Optional[AsyncPage] = None  # Page of the client the nav card was rendered into.
+        self.card_name: Optional[str] = None  # Name of the nav card in the page.
+        self.window_start: int = 0  # First rendered row, if the SideMenu has a window_size.
+        self.window_item: Optional[str] = None  # Item to move the window to on the next render.
+        self.filter: Optional[
+            str
+        ] = None  # If set, only the items matching it are rendered, see set_filter.
+        self.roles: FrozenSet[str] = frozenset(
+            roles
+        )  # Roles of the user, items with other roles are hidden.
+        self.events: int = (
+            0  # Number of sidebar events handled, coalesce finds the superseded ones with it.
+        )
+        self.event_at: float = 0.0  # Monotonic time of the last sidebar event.
+        self._lock: Optional[asyncio.Lock] = None  # Created on first use, see lock.
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        """Held from rendering the nav card until the page is saved, by the requests of the client and by
+        SideMenu.broadcast, so the client gets the changes in the order they were rendered"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(collapsed={self.collapsed!r}, "
+            f"active_root={self.active_root!r}, expanded={self.expanded!r}, roles={set(self.roles)!r})"
+        )
+
+
+class SideMenu:
+    toggle_collapse_name: str = "side_menu_toggle_collapse"  # Name of the collapse button item.
+    documentation_name: str = "mv_documentation"  # Name of the documentation item.
+    show_previous_name: str = "side_menu_show_previous"  # Name of the item moving the window up.
+    show_more_name: str = "side_menu_show_more"  # Name of the item moving the window down.
+
+    def __init__(
+        self,
+        items: Optional[List[SideMenuItem]] = None,
+        collapsed: bool = False,
+        collapsable: bool = True,
+        disable_group_names: bool = True,
+        auto_width: bool = True,
+        documentation: bool = False,
+        render_cache_size: int = 128,
+        label_width: Callable[[str], int] = len,
+        instrumentation: Optional[Instrumentation] = None,
+        multi_expand: bool = False,
+        window_size: Optional[int] = None,
+        coalesce_delay: Optional[float] = None,
+    ):
+        self._start_collapsed = (
+            collapsed  # State of collapsed or not. If True, app wil start with collapsed side-menu.
+        )
+        self.state = SideMenuState(
+            collapsed=collapsed
+        )  # Default state, used when no client state is passed to the methods.
+        self.collapsable = collapsable  # If True, side-menu can be collapsed and collapsed button will be rendered.
+        self.disable_group_names = disable_group_names  # If True, group names will not be rendered.
+        self.documentation = documentation  # If True, documentation item will be rendered.
+        self.multi_expand = (
+            multi_expand  # If True, clicking an item expands it without collapsing the others.
+        )
+        self.window_size = (
+            window_size  # If set, only this many rows are rendered, with items to page them.
+        )
+        self.coalesce_delay = (
+            coalesce_delay  # If set, seconds coalesce waits for more events of a client.
+        )
+        self._show_previous_label: str = "Show previous"  # Label of the item moving the window up.
+        self._show_more_label: str = "Show more"  # Label of the item moving the window down.
+        self._badge_format: str = "{label} ({badge})"  # Label of the items with a badge.
+        self.instrumentation: Instrumentation = (
+            instrumentation or NullInstrumentation()
+        )  # Records phase timings and counters, nothing by default.
+        self._version: int = (
+            0  # Incremented each time items are changed, invalidates rendered content.
+        )
+        self._render_cache: OrderedDict = (
+            OrderedDict()
+        )  # State fingerprint -> rendered nav contents and widths.
+        self._render_cache_size: int = (
+            render_cache_size  # Max number of rendered contents kept (LRU).
+        )
+        self._group_cache: OrderedDict = OrderedDict()  # Group fingerprint -> rendered nav group.
+        self._changed_names: Set[
+            str
+        ] = set()  # Items whose display attributes changed since the last broadcast.
+        self._structure_changed: bool = False  # If True, broadcast checks all the clients.
+        self._index: Dict[str, SideMenuItem] = {}  # Name -> item, for items at any depth.
+        self._parents: Dict[str, SideMenuItem] = {}  # Child name -> parent item.
+        self._loaded_at: Dict[
+            str, float
+        ] = {}  # Name -> time sub items were loaded from the provider.
+        self._loading: Dict[
+            str, asyncio.Future
+        ] = {}  # Name -> sub items being loaded from the provider.
+        self._owner: Tuple[weakref.ref, ...] = (
+            weakref.ref(self),
+        )  # Owners of the items of this menu only.
+        self._clients: weakref.WeakSet = (
+            weakref.WeakSet()
+        )  # States rendered into a client page, dropped with the client state.
+        self.item_source: Optional[
+            SharedMenuTree
+        ] = None  # Finds items not loaded yet, set by open_shared.
+        self._search_index: Optional[
+            SearchIndex
+        ] = None  # Built on the first search, updated with the items.
+        self._restricted: Dict[str, SideMenuItem] = {}  # Name -> item with roles, at any depth.
+        self._role_bits: Dict[str, int] = {}  # Role name -> bit of the role in the role masks.
+        self._role_masks: Dict[
+            str, int
+        ] = {}  # Name -> mask of the roles of the item, for items with role names.
+        self._hidden_cache: Dict[
+            FrozenSet[str], FrozenSet[str]
+        ] = {}  # Roles -> names of the hidden items.
+        self._role_widths: Dict[
+            FrozenSet[str], Optional[int]
+        ] = {}  # Hidden items -> widest always rendered item.
+        self._label_width = (
+            label_width  # Measures label width for auto_width, e.g. len or glyph_width.
+        )
+        self._static_widths: Counter = (
+            Counter()
+        )  # Width -> number of items always rendered with that width.
+        self._rendered_widths: Dict[
+            str, int
+        ] = {}  # Name -> width of the items counted in _static_widths.
+        self._children_widths: Dict[
+            str, int
+        ] = {}  # Parent name -> widest sub item, used when expanded.
+        self._groups: Dict[
+            Optional[str], List[SideMenuItem]
+        ] = {}  # Group -> top-level items, in the order of the first appearance of the group.
+        self.items = items or []  # List of SideMenuItem, indexed by the setter.
+        self._documentation_icon: str = "Documentation"  # Icon for documentation item.
+        self._documentation_label: str = "Documentation"  # Label for documentation item.
+        self._auto_width: bool = auto_width  # If True, width will be calculated based on the longest item label, and min_width&max_width attributes.
+        self._min_width: int = 200  # Minimum width of the side-menu.
+        self._max_width: int = 300  # Maximum width of the side-menu.
+        self._width: List[str] = [
+            "210px",
+            "48px",
+        ]  # Width of the side-menu. First item is for the un-collapsed state, second item is for the collapsed state.
+        self._height: str = "100%"  # Height of the side-menu.
+        self._collapse_button_icon: List[str] = [
+            "DoubleChevronLeft8",
+            "DoubleChevronRight8",
+        ]  # Icon for collapse button. First item is for the un-collapsed state, second item is for the collapsed state.
+        self._collapsed_item_label: str = ""  # Label for collapsed items.
+        self._collapsed_group_label: str = ""  # Label for collapsed groups.
+        self._collapsed_sub_item_icon: str = (
+            "DecreaseIndentArrowMirrored"  # Icon for collapsed sub-items.
+        )
+        self._sub_item_label_start: str = "•"  # Label start for sub-items.
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Copies and pickles of the menu leave out its clients and the sub items being loaded"""
+        state = self.__dict__.copy()
+        for key in ("_owner", "_clients", "_loading"):
+            del state[key]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._owner = (weakref.ref(self),)
+        self._clients = weakref.WeakSet()
+        self._loading = {}
+        for item in self._index.values():
+            self._own(item)
+
+    def new_state(self, roles: Collection[str] = ()) -> SideMenuState:
+        """Returns a fresh state for a new client, with the roles of the user"""
+        return SideMenuState(collapsed=self._start_collapsed, roles=roles)
+
+    def get_state(self, q: Q) -> SideMenuState:
+        """Returns the state of the client, creating it on the client's first request"""
+        if q.client.side_menu_state is None:
+            q.client.side_menu_state = self.new_state()
+        return q.client.side_menu_state
+
+    @property
+    def collapsed(self) -> bool:
+        return self.state.collapsed
+
+    @collapsed.setter
+    def collapsed(self, value: bool):
+        self.state.collapsed = value
+
+    @property
+    def active_root_item(self) -> Optional[SideMenuItem]:
+        """Active root item of the default state. It's needed to expand the root item when it's active."""
+        if self.state.active_root is None:
+            return None
+        return self.get_item(self.state.active_root)
+
+    @active_root_item.setter
+    def active_root_item(self, item: Optional[SideMenuItem]):
+        self.state.active_root = item.name if item else None
+
+    @property
+    def expand_root_item(self) -> bool:
+        """If True, active root item of the default state is expanded on the side-menu"""
+        return self.state.active_root in self.state.expanded
+
+    @expand_root_item.setter
+    def expand_root_item(self, value: bool):
+        if self.state.active_root is None:
+            return
+        if value:
+            self.state.expanded.add(self.state.active_root)
+        else:
+            self.state.expanded.discard(self.state.active_root)
+
+    def toggle_state(self, state: Optional[SideMenuState] = None):
+        """Toggle the flag variable each time collapse button is clicked"""
+        state = state or self.state
+        state.collapsed = not state.collapsed
+
+    @property
+    def items(self) -> Sequence[SideMenuItem]:
+        """Top-level items, as a tuple: changing them in place would bypass the indexes,
+        use add_item/remove_item or assign a new list instead"""
+        return tuple(self._items)
+
+    @items.setter
+    def items(self, value: Sequence[SideMenuItem]):
+        self._items = list(value)  # A copy, menus built from the same list don't change each other
+        self.reindex()
+
+    def reindex(self):
+        """Rebuild the name and parent indexes from scratch.
+        Needed only when sub_items lists are mutated in place instead of using add_item/remove_item.
+        """
+        for item in self._index.values():
+            self._disown(item)
+        self._index = {}
+        self._parents = {}
+        self._static_widths = Counter()
+        self._rendered_widths = {}
+        self._children_widths = {}
+        self._search_index = None
+        self._restricted = {}
+        for item in self._items:
+            self._index_item(item)
+        self._regroup()
+        self.invalidate()
+
+    def _restore(
+        self,
+        items: List[SideMenuItem],
+        index: Dict[str, SideMenuItem],
+        parents: Dict[str, SideMenuItem],
+        groups: Dict[Optional[str], List[SideMenuItem]],
+        rendered_widths: Dict[str, int],
+        children_widths: Dict[str, int],
+    ):
+        """Sets the items with their precomputed indexes (e.g. loaded from a saved definition) instead of
+        rebuilding the indexes"""
+        for item in index.values():
+            self._own(item)
+        self._items = items
+        self._index = index
+        self._parents = parents
+        self._groups = groups
+        self._rendered_widths = rendered_widths
+        self._static_widths = Counter(rendered_widths.values())
+        self._children_widths = children_widths
+        self._loaded_at = {}
+        self._search_index = None
+        self._restricted = {item.name: item for item in index.values() if item.roles is not None}
+        self.invalidate()
+
+    def save(self, path: Union[str, Path]):
+        """Saves the menu definition with its indexes into the file, as JSON for .json files, pickled otherwise"""
+        from .definition import save_menu
+
+        save_menu(self, path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], **options) -> SideMenu:
+        """Loads a menu saved with save. Options override the saved SideMenu arguments"""
+        from .definition import load_menu
+
+        return load_menu(path, **options)
+
+    def _regroup(self):
+        """Rebuild the group -> items mapping in a single pass over top-level items"""
+        self._groups = {}
+        for item in self._items:
+            self._groups.setdefault(item.group, []).append(item)
+
+    def invalidate(self, *names: str):
+        """Drop the rendered nav content. Called whenever items or display settings change.
+        Names are the items whose label, icon, disabled flag or badge changed, which broadcast sends to the clients
+        showing them. Without names, the whole menu is considered changed."""
+        self._version += 1
+        self._render_cache.clear()
+        self._role_widths.clear()
+        if names:
+            self._changed_names.update(names)
+            # Only the groups showing the items are rendered again
+            groups = {
+                (self.get_root_item(name) or self._index[name]).group
+                for name in names
+                if name in self._index
+            }
+            for key in [key for key in self._group_cache if key[0] in groups]:
+                del self._group_cache[key]
+        else:
+            self._group_cache.clear()
+            self._structure_changed = True
+            self._hidden_cache.clear()
+            self._role_masks.clear()  # Compiled again on the next render
+
+    def _item_changed(self, item: SideMenuItem, key: str, old_value: Any):
+        """Called by SideMenuItem when one of its attributes is set"""
+        if key == "name":
+            self.reindex()
+            return
+        if key == "sub_items":
+            # Only the replaced sub items are (un)indexed
+            for sub_item in old_value or []:
+                self._unindex_item(sub_item)
+            for sub_item in item.sub_items:
+                self._index_item(sub_item, item)
+            self._measure_children(item)
+            self._measure_ancestors(item)
+        elif key == "group" and item.name not in self._parents:
+            self._regroup()
+        elif key == "roles":
+            self._restrict(item)
+        elif key in ("label", "render", "badge"):
+            if key == "label" and self._search_index is not None:
+                self._search_index.remove(item.name)
+                self._search_index.add(item)
+            if key == "render":
+                self._track_subtree(
+                    item
+                )  # Descendants are always rendered only under rendered items
+            else:
+                self._untrack_width(item)
+                self._track_width(item)
+            self._measure_ancestors(item)
+        if key in ("label", "icon", "expanded_icon", "disabled", "badge"):
+            self.invalidate(item.name)  # Only the clients showing the item are affected
+        else:
+            self.invalidate()
+
+    def _item_width(self, item: SideMenuItem) -> int:
+        """Returns label width of the item with its badge. Adding 2 for each level of sub items due to the indent
+        and the bullet"""
+        return self._label_width(self._badged_label(item)) + 2 * self.get_depth(item.name)
+
+    def get_depth(self, name: str) -> int:
+        """Returns the nesting depth of the item, 0 for top-level items"""
+        depth = 0
+        parent = self._parents.get(name)
+        while parent is not None:
+            depth += 1
+            parent = self._parents.get(parent.name)
+        return depth
+
+    def _always_rendered(self, item: SideMenuItem) -> bool:
+        """Returns True if the item is rendered whatever the expanded items are: its render flag is set, and
+        so are the flags of its ancestors below the top-level one, whose sub items are rendered anyway"""
+        if not item.render:
+            return False
+        parent = self._parents.get(item.name)
+        while parent is not None and parent.name in self._parents:
+            if not parent.render:
+                return False
+            parent = self._parents[parent.name]
+        return True
+
+    def _track_width(self, item: SideMenuItem):
+        """Counts the item's width if it's always rendered"""
+        if self._always_rendered(item):
+            width = self._item_width(item)
+            self._rendered_widths[item.name] = width
+            self._static_widths[width] += 1
+
+    def _untrack_width(self, item: SideMenuItem):
+        width = self._rendered_widths.pop(item.name, None)
+        if width is not None:
+            self._static_widths[width] -= 1
+            if self._static_widths[width] == 0:
+                del self._static_widths[width]
+
+    def _measure_children(self, item: SideMenuItem):
+        """Updates the widest sub item of the item, used for the width when the item is expanded"""
+        if len(item.sub_items) > 0:
+            self._children_widths[item.name] = max(
+                self._branch_width(sub_item) for sub_item in item.sub_items
+            )
+        else:
+            self._children_widths.pop(item.name, None)
+
+    def _measure_ancestors(self, item: SideMenuItem):
+        """Updates the widest sub items of the ancestors of the item, which may render it"""
+        parent = self._parents.get(item.name)
+        while parent is not None:
+            self._measure_children(parent)
+            parent = self._parents.get(parent.name)
+
+    def _branch_width(self, item: SideMenuItem, hidden: FrozenSet[str] = frozenset()) -> int:
+        """Returns the widest of the item and the sub items rendered with it, i.e. the ones with the render
+        flag set below it, leaving out the hidden ones"""
+        width = self._item_width(item)
+        for sub_item in item.sub_items:
+            if sub_item.render and sub_item.name not in hidden:
+                width = max(width, self._branch_width(sub_item, hidden))
+        return width
+
+    def _track_subtree(self, item: SideMenuItem):
+        """Counts the widths of the item and its descendants again, e.g. when its render flag changed"""
+        stack = [item]
+        while stack:
+            sub_item = stack.pop()
+            self._untrack_width(sub_item)
+            self._track_width(sub_item)
+            stack.extend(sub_item.sub_items)
+
+    def _index_item(self, item: SideMenuItem, parent: Optional[SideMenuItem] = None):
+        """Adds the item and all of its descendants to the indexes"""
+        if item.name in self._index:
+            raise ValueError(f"Duplicate SideMenuItem name: {item.name!r}")
+        self._index[item.name] = item
+        self._own(item)
+        if parent is not None:
+            self._parents[item.name] = parent
+        if self._search_index is not None:
+            self._search_index.add(item)
+        self._restrict(item)
+        self._track_width(item)
+        for sub_item in item.sub_items:
+            self._index_item(sub_item, item)
+        self._measure_children(item)
+
+    def _unindex_item(self, item: SideMenuItem):
+        """Removes the item and all of its descendants from the indexes"""
+        if self._index.get(item.name) is not item:
+            return  # Not indexed, e.g. an item with the name of another item, which stays indexed
+        self._untrack_width(item)
+        self._children_widths.pop(item.name, None)
+        self._loaded_at.pop(item.name, None)
+        self._index.pop(item.name, None)
+        self._parents.pop(item.name, None)
+        if self._search_index is not None:
+            self._search_index.remove(item.name)
+        self._restricted.pop(item.name, None)
+        self._disown(item)
+        for sub_item in item.sub_items:
+            self._unindex_item(sub_item)
+
+    def _own(self, item: SideMenuItem):
+        """Adds the menu to the owners of the item. Items may be shared by several menus, e.g. when
+        q.app.side_menu is rebuilt from the same items, and changing them invalidates all of them.
+        Owners are weak references, so a dropped menu doesn't stay alive with its items."""
+        if item._menus is not self._owner:
+            others = self._other_owners(item)
+            object.__setattr__(item, "_menus", others + self._owner if others else self._owner)
+
+    def _disown(self, item: SideMenuItem):
+        """Removes the menu from the owners of the item"""
+        if item._menus is self._owner:
+            object.__setattr__(item, "_menus", ())
+        elif item._menus:
+            object.__setattr__(item, "_menus", self._other_owners(item))
+
+    def _other_owners(self, item: SideMenuItem) -> Tuple[weakref.ref, ...]:
+        """Returns the owners of the item other than this menu, leaving out the dropped ones"""
+        return tuple(owner for owner in item._menus if owner() not in (None, self))
+
+    def _restrict(self, item: SideMenuItem):
+        """Keeps track of the items with roles, which are compiled into role masks by _hidden"""
+        if item.roles is None:
+            self._restricted.pop(item.name, None)
+        else:
+            self._restricted[item.name] = item
+
+    def _hidden(self, state: SideMenuState) -> FrozenSet[str]:
+        """Returns names of the items hidden from the roles of the state. Sub items of hidden items are hidden
+        too, without being listed. Computed once per role set, role names of the items are compiled into bit
+        masks, so each item is checked with a single AND. Predicates are called once per role set."""
+        if not self._restricted:
+            return frozenset()
+        hidden = self._hidden_cache.get(state.roles)
+        if hidden is not None:
+            return hidden
+        if not self._role_masks:
+            for name, item in self._restricted.items():
+                if not callable(item.roles):
+                    mask = 0
+                    for role in item.roles:  # type: ignore
+                        mask |= self._role_bits.setdefault(role, 1 << len(self._role_bits))
+                    self._role_masks[name] = mask
+        roles_mask = 0
+        for role in state.roles:
+            roles_mask |= self._role_bits.get(role, 0)
+        hidden = self._hidden_cache[state.roles] = frozenset(
+            name
+            for name, item in self._restricted.items()
+            if not (
+                item.roles(state.roles)
+                if callable(item.roles)
+                else self._role_masks[name] & roles_mask
+            )
+        )
+        return hidden
+
+    def is_visible(self, name: str, state: Optional[SideMenuState] = None) -> bool:
+        """Returns True if neither the item nor any of its ancestors is hidden from the roles of the state"""
+        hidden = self._hidden(state or self.state)
+        if not hidden:
+            return name in self._index
+        if name in hidden or name not in self._index:
+            return False
+        return all(parent.name not in hidden for parent in self.get_ancestors(name))
+
+    def add_item(
+        self, item: SideMenuItem, parent: Optional[str] = None, index: Optional[int] = None
+    ):
+        """Adds an item (with its sub items) to the menu, or under the parent item if a name is passed.
+        If index is passed, the item is inserted at that position instead of being appended."""
+        self._insert(item, parent, index)
+        if parent is None and index is not None:
+            self._regroup()  # Insert position may change the order of groups
+        self.invalidate()
+
+    def remove_item(self, name: str) -> SideMenuItem:
+        """Removes the item (with its sub items) from the menu and returns it"""
+        item, parent = self._delete(name)
+        if parent is None:
+            self._regroup()
+        self.invalidate()
+        return item
+
+    async def apply_changes(
+        self,
+        add: Sequence[Tuple[SideMenuItem, Optional[str], Optional[int]]] = (),
+        remove: Sequence[str] = (),
+        move: Optional[Dict[str, Tuple[Optional[str], Optional[int]]]] = None,
+        update: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_concurrency: int = 64,
+    ) -> int:
+        """Changes the menu in place, keeping the states of the clients, and sends the changed nav items to
+        the connected clients whose sidebar changed. Returns the number of clients updated.
+        remove: names of the items to remove (with their sub items).
+        move: name -> (new parent name or None for top-level, index or None to append).
+        add: (item, parent name or None for top-level, index or None to append) tuples.
+        update: name -> attributes to set, e.g. dict(label="Reports", disabled=True), except name and sub_items.
+        Indexes, groups and widths are updated once for all the changes. Removed items are dropped from
+        the expanded items of the states. Changes are sent with broadcast.
+        All the changes are checked before any of them is applied, so an invalid change (unknown name,
+        duplicate name, moving an item under itself) raises without changing the menu."""
+        self._check_changes(add, remove, move or {}, update or {})
+        top_level = False  # Groups are rebuilt only if top-level items changed
+        applied = False
+        try:
+            for name in remove:
+                _, parent = self._delete(name)
+                top_level = top_level or parent is None
+            for name, (parent_name, index) in (move or {}).items():
+                item, parent = self._delete(name)
+                self._insert(item, parent_name, index)
+                top_level = top_level or parent is None or parent_name is None
+            for item, parent_name, index in add:
+                self._insert(item, parent_name, index)
+                top_level = top_level or (parent_name is None and index is not None)
+            applied = True
+        finally:
+            if top_level or not applied:
+                self._regroup()
+            if remove or move or add:
+                self.invalidate()
+        for name, attributes in (update or {}).items():
+            item = self._index[name]
+            for key, value in attributes.items():
+                setattr(
+                    item, key, value
+                )  # Invalidates only the groups of the item for display attributes
+
+        if remove:
+            for state in (self.state, *self._clients):
+                state.expanded.difference_update(
+                    [name for name in state.expanded if name not in self._index]
+                )
+                if state.active_root not in self._index:
+                    state.active_root = None
+        return await self.broadcast(max_concurrency)
+
+    def _check_changes(
+        self,
+        add: Sequence[Tuple[SideMenuItem, Optional[str], Optional[int]]],
+        remove: Sequence[str],
+        move: Dict[str, Tuple[Optional[str], Optional[int]]],
+        update: Dict[str, Dict[str, Any]],
+    ):
+        """Raises if apply_changes would fail on the changes, in the order it applies them:
+        KeyError for unknown names, ValueError for duplicate names or items moved under themselves,
+        AttributeError for unknown attributes. Names and sub items can't be updated, they are changed by
+        removing and adding the items."""
+        removed: Set[str] = set()
+        for name in remove:
+            if name not in self._index or name in removed:
+                raise KeyError(name)
+            stack = [self._index[name]]
+            while stack:
+                item = stack.pop()
+                removed.add(item.name)
+                stack.extend(item.sub_items)
+
+        def exists(name: str) -> bool:
+            return (name in self._index and name not in removed) or name in added
+
+        moved: Dict[str, Optional[str]] = {}  # Name -> new parent name.
+        added: Set[str] = set()
+        for name, (parent_name, _) in move.items():
+            if not exists(name) or (parent_name is not None and not exists(parent_name)):
+                raise KeyError(name if not exists(name) else parent_name)
+            ancestor = parent_name
+            while ancestor is not None:
+                if ancestor == name:
+                    raise ValueError(f"Can't move SideMenuItem {name!r} under itself")
+                if ancestor in moved:
+                    ancestor = moved[ancestor]
+                else:
+                    parent = self._parents.get(ancestor)
+                    ancestor = None if parent is None else parent.name
+            moved[name] = parent_name
+        for item, parent_name, _ in add:
+            if parent_name is not None and not exists(parent_name):
+                raise KeyError(parent_name)
+            stack = [item]
+            while stack:
+                sub_item = stack.pop()
+                if exists(sub_item.name):
+                    raise ValueError(f"Duplicate SideMenuItem name: {sub_item.name!r}")
+                added.add(sub_item.name)
+                stack.extend(sub_item.sub_items)
+        for name, attributes in update.items():
+            if not exists(name):
+                raise KeyError(name)
+            for key in attributes:
+                if key not in SideMenuItem._fields:
+                    raise AttributeError(f"SideMenuItem has no attribute {key!r}")
+                if key in ("name", "sub_items"):
+                    raise ValueError(f"Can't update {key!r} of {name!r}, use remove, add and move")
+
+    def set_badges(self, badges: Dict[str, Any]) -> List[str]:
+        """Sets the badges of many items (name -> badge) at once, unknown names are skipped.
+        Widths are updated once per parent and the nav content is invalidated once, for the groups of the changed
+        items only. Returns names of the items whose badge changed, which broadcast sends to the clients."""
+        changed: List[str] = []
+        parents: Dict[
+            str, SideMenuItem
+        ] = {}  # Name -> ancestors of the changed items, measured once.
+        for name, badge in badges.items():
+            item = self._index.get(name)
+            if item is None or item.badge == badge:
+                continue
+            old_badge = item.badge
+            object.__setattr__(
+                item, "badge", badge
+            )  # This menu is updated once for all the items below
+            for owner in self._other_owners(item):
+                menu = owner()
+                if menu is not None:
+                    menu._item_changed(item, "badge", old_badge)
+            self._untrack_width(item)
+            self._track_width(item)
+            for parent in self.get_ancestors(name):
+                parents[parent.name] = parent
+            changed.append(name)
+        for parent in parents.values():
+            self._measure_children(parent)
+        if changed:
+            self.invalidate(*changed)
+        return changed
+
+    async def broadcast(self, max_concurrency: int = 64) -> int:
+        """Sends the changes made to the menu since the last broadcast to the connected clients.
+        If only labels, icons or disabled flags changed, only the clients whose sidebar shows one of the
+        changed items, or whose width changed, are rendered, checked once per nav content shared by the clients.
+        Each client is rendered and saved holding state.lock, which requests of the client hold from render
+        until their page is saved, so the changes aren't sent before changes rendered earlier.
+        Pages are saved concurrently, at most max_concurrency at a time. Returns the number of clients updated."""
+        with self.instrumentation.phase("broadcast"):
+            changed_names, structure_changed = self._changed_names, self._structure_changed
+            self._changed_names, self._structure_changed = set(), False
+            if not changed_names and not structure_changed:
+                return 0
+
+            shows_changes: Dict[
+                int, bool
+            ] = {}  # Id of the sent nav content -> shows a changed item.
+            nav_changes: Dict[
+                Tuple[int, int], list
+            ] = {}  # Ids of the sent and new nav contents -> changes.
+
+            def outdated(state: SideMenuState) -> bool:
+                if state.page is None or state.sent_items is None:
+                    return False
+                if structure_changed:
+                    return True
+                key = id(state.sent_items)
+                if key not in shows_changes:
+                    shows_changes[key] = any(
+                        item.name in changed_names
+                        for group in state.sent_items
+                        for item in group.items
+                    )
+                # Items out of the window or under collapsed items may change the width too
+                return shows_changes[key] or self.get_width(state) != state.sent_width
+
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def send(state: SideMenuState) -> bool:
+                """Renders the changes into a new page of the client and saves it.
+                Returns False if nothing changed for the client."""
+                async with state.lock, semaphore:
+                    if not outdated(state):  # e.g. a request of the client sent the changes
+                        return False
+                    # A new page, so changes pending in a request of the client aren't sent with these
+                    page = AsyncPage(state.page.site, state.page.url)  # type: ignore
+                    if not self._render_page(
+                        page, state, state.sent_value, state.card_name, nav_changes  # type: ignore
+                    ):
+                        return False
+                    try:
+                        await page.save()
+                    except Exception as e:
+                        logger.warning("Sending side menu changes failed: %s", e)
+                        # The client may have missed any of the changes, its next render sends the
+                        # whole nav card
+                        state.sent_items = None
+                        raise
+                    return True
+
+            results = await asyncio.gather(
+                *(send(state) for state in list(self._clients) if outdated(state)),
+                return_exceptions=True,
+            )
+
+        sent = sum(result is True for result in results)
+        errors = sum(isinstance(result, Exception) for result in results)
+        self.instrumentation.count("broadcast_pages", sent)
+        if errors:
+            self.instrumentation.count("broadcast_errors", errors)
+        return sent
+
+    def _insert(self, item: SideMenuItem, parent: Optional[str], index: Optional[int]):
+        """Adds the item into the tree and the indexes. Groups are only updated when it's appended"""
+        siblings = self._items if parent is None else self._sub_items_list(self._index[parent])
+        self._index_item(item, None if parent is None else self._index[parent])
+        if index is None:
+            siblings.append(item)
+            if parent is None:
+                self._groups.setdefault(item.group, []).append(item)
+        else:
+            siblings.insert(index, item)
+        self._measure_ancestors(item)
+
+    def _delete(self, name: str) -> Tuple[SideMenuItem, Optional[SideMenuItem]]:
+        """Removes the item from the tree and the indexes, groups aren't updated.
+        Returns the item and its former parent."""
+        item = self._index[name]
+        parent = self._parents.get(name)
+        (self._items if parent is None else self._sub_items_list(parent)).remove(item)
+        self._unindex_item(item)
+        if parent is not None:
+            self._measure_children(parent)
+            self._measure_ancestors(parent)
+        return item, parent
+
+    @staticmethod
+    def _sub_items_list(item: SideMenuItem) -> List[SideMenuItem]:
+        """Returns sub items of the item as a list, which can be changed in place"""
+        sub_items = item.sub_items
+        if not isinstance(sub_items, list):
+            sub_items = list(sub_items)
+            object.__setattr__(item, "sub_items", sub_items)  # Same items, nothing to notify
+        return sub_items
+
+    def get_item(self, name: str) -> Optional[SideMenuItem]:
+        """Returns SideMenuItem based on name"""
+        return self._index.get(name)
+
+    def get_parent_item(self, name: str) -> Optional[SideMenuItem]:
+        """Returns the direct parent SideMenuItem of the item, None for top-level items"""
+        return self._parents.get(name)
+
+    def get_root_item(self, name: str) -> Optional[SideMenuItem]:
+        """Returns root SideMenuItem based on subitem's name.
+        For deeper nesting, the top-level ancestor is returned. None for top-level items."""
+        root = self._parents.get(name)
+        while root is not None and root.name in self._parents:
+            root = self._parents[root.name]
+        return root
+
+    def get_ancestors(self, name: str) -> List[SideMenuItem]:
+        """Returns the ancestors of the item, starting from its top-level ancestor"""
+        ancestors = []
+        parent = self._parents.get(name)
+        while parent is not None:
+            ancestors.append(parent)
+            parent = self._parents.get(parent.name)
+        return ancestors[::-1]
+
+    def _find(self, query: str) -> Set[str]:
+        """Returns names of the items whose label or name contains the query, building the index if needed"""
+        if self._search_index is None:
+            from .search import SearchIndex
+
+            self._search_index = SearchIndex(self._index.values())
+        return self._search_index.find(query)
+
+    def search(
+        self, query: str, limit: Optional[int] = None, state: Optional[SideMenuState] = None
+    ) -> List[SearchMatch]:
+        """Returns the items whose label or name contains the query (ignoring case), at any depth, with their
+        ancestors. Items whose label starts with the query come first, then the ones closer to the top-level.
+        Items hidden from the roles of the state aren't returned.
+        Only the loaded items are searched, sub items of an item_source are found once they are loaded."""
+        from .search import SearchMatch
+
+        with self.instrumentation.phase("search"):
+            query = query.strip()
+            prefix = query.lower()
+
+            def rank(name: str):
+                label = self._index[name].label.lower()
+                return not label.startswith(prefix), self.get_depth(name), label
+
+            names = self._find(query)
+            if self._hidden(state or self.state):
+                names = {name for name in names if self.is_visible(name, state)}
+            ranked = (
+                sorted(names, key=rank)
+                if limit is None
+                else heapq.nsmallest(limit, names, key=rank)
+            )
+            return [SearchMatch(self._index[name], self.get_ancestors(name)) for name in ranked]
+
+    def set_filter(self, query: Optional[str], state: Optional[SideMenuState] = None):
+        """Renders only the items matching the query (and their ancestors) for the state, None or an empty
+        query renders all the items again. The window is moved back to the first row."""
+        state = state or self.state
+        state.filter = (query or "").strip() or None
+        state.window_start = 0
+
+    def enable_subitems(self, name: Optional[str] = None, state: Optional[SideMenuState] = None):
+        """Enable rendering all subitems.
+        The state is changed instead of the render flags of the sub items, which are shared by all clients."""
+        state = state or self.state
+        if name:  # Only enable rendering subitems of the item passed
+            item = self.get_item(name)
+            if item and (len(item.sub_items) > 0 or item.sub_items_provider):
+                state.expanded.add(item.name)
+            return
+
+        # Enable rendering all the subitems
+        state.expanded.update(
+            item.name for item in self._items if len(item.sub_items) > 0 or item.sub_items_provider
+        )
+
+    async def load_sub_items(self, name: str) -> bool:
+        """Loads sub items of the item from its sub_items_provider, if they aren't loaded or expired.
+        Concurrent calls for the same item wait for the same load.
+        Returns False if the provider failed, which is logged, the item keeps its current sub items."""
+        item = self._index.get(name)
+        if item is None or item.sub_items_provider is None:
+            return True
+        loaded_at = self._loaded_at.get(name)
+        if loaded_at is not None and (
+            item.sub_items_ttl is None or time.monotonic() - loaded_at < item.sub_items_ttl
+        ):
+            return True
+
+        loading = self._loading.get(name)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load_sub_items(item, item.sub_items_provider))
+            self._loading[name] = loading
+            loading.add_done_callback(lambda _: self._loading.pop(name, None))
+        return await loading
+
+    async def _load_sub_items(
+        self, item: SideMenuItem, provider: Callable[[], Union[List, Awaitable[List]]]
+    ) -> bool:
+        try:
+            sub_items: Any = provider()
+            if inspect.isawaitable(sub_items):
+                sub_items = await sub_items
+            sub_items = list(sub_items)
+            self._check_sub_items(item, sub_items)
+            item.sub_items = sub_items  # Indexes are updated by _item_changed
+        except Exception:
+            logger.exception("Loading sub items of %r failed", item.name)
+            return False
+        self._loaded_at[item.name] = time.monotonic()
+        return True
+
+    def _check_sub_items(self, item: SideMenuItem, sub_items: Sequence[SideMenuItem]):
+        """Raises ValueError if the sub items (with their descendants) replacing the sub items of the item
+        have a name used twice, or used by an item the replacement keeps in the menu"""
+        replaced: Set[str] = set()
+        stack = list(item.sub_items)
+        while stack:
+            sub_item = stack.pop()
+            replaced.add(sub_item.name)
+            stack.extend(sub_item.sub_items)
+        names: Set[str] = set()
+        stack = list(sub_items)
+        while stack:
+            sub_item = stack.pop()
+            if sub_item.name in names or (
+                sub_item.name in self._index and sub_item.name not in replaced
+            ):
+                raise ValueError(f"Duplicate SideMenuItem name: {sub_item.name!r}")
+            names.add(sub_item.name)
+            stack.extend(sub_item.sub_items)
+
+    async def load_item(self, name: str) -> Optional[SideMenuItem]:
+        """Returns the item, loading sub items of its ancestors first if the item_source has the item
+        but it isn't loaded yet"""
+        item = self._index.get(name)
+        if item is not None or self.item_source is None:
+            return item
+        for ancestor in self.item_source.ancestors(name):
+            await self.load_sub_items(ancestor)
+        return self._index.get(name)
+
+    async def load_expanded(self, state: Optional[SideMenuState] = None):
+        """Loads sub items of the expanded items of the state from their providers.
+        Items whose sub items failed to load are collapsed, so they are loaded again when clicked."""
+        state = state or self.state
+        for name in list(state.expanded):
+            if not await self.load_sub_items(name):
+                state.expanded.discard(name)
+
+    def disable_subitems(self, name: Optional[str] = None, state: Optional[SideMenuState] = None):
+        """Disable rendering all subitems"""
+        state = state or self.state
+        if name:  # Only disable rendering subitems of the item passed
+            state.expanded.discard(name)
+            return
+
+        state.expanded.clear()  # Disable rendering all the subitems
+
+    def select(self, name: str, state: Optional[SideMenuState] = None) -> Optional[str]:
+        """Applies the state transition of clicking the item and returns the new active page.
+        Clicking a top-level item collapses all the items and makes it the active root item,
+        items with expand_always are expanded.
+        Clicking a sub item expands its ancestors (and itself, if it has sub items) only and makes its top-level
+        ancestor the active root item.
+        With multi_expand, the other items stay expanded and clicking an item with sub items toggles it instead.
+        Returns None for the collapse button (active page doesn't change), names unknown to the SideMenu and
+        items hidden from the roles of the state."""
+        state = state or self.state
+        if name == self.toggle_collapse_name:
+            self.toggle_state(state)
+            return None
+        if name == self.documentation_name:
+            return name
+        if name in (self.show_previous_name, self.show_more_name) and self.window_size:
+            step = self.window_size if name == self.show_more_name else -self.window_size
+            last_start = max(0, self._row_count(state) - self.window_size)
+            state.window_start = min(max(0, state.window_start + step), last_start)
+            return None
+        item = self._index.get(name)
+        if item is None or not self.is_visible(name, state):
+            return None
+        state.window_item = name  # Keep the clicked item in the window
+
+        if not self.multi_expand:
+            state.expanded.clear()
+            if item.expand_always or name in self._parents:
+                self.enable_subitems(name, state)
+        elif name in state.expanded:
+            state.expanded.discard(name)
+        else:
+            self.enable_subitems(name, state)
+
+        root = item
+        parent = self._parents.get(name)
+        while parent is not None:
+            state.expanded.add(parent.name)
+            root = parent
+            parent = self._parents.get(parent.name)
+        state.active_root = root.name
+        return name
+
+    async def handle_click(self, q: Q, state: Optional[SideMenuState] = None) -> Optional[str]:
+        """Finds the clicked item of the SideMenu in q.args and applies its state transition.
+        Sub items of the expanded items (and of the ancestors of the clicked item) are loaded if needed.
+        Returns the new active page, None if the active page doesn't change."""
+        state = state or self.state
+        with self.instrumentation.phase("handle_args"):
+            for name, value in expando_to_dict(q.args).items():
+                if value and (
+                    name in self._index
+                    or name == self.toggle_collapse_name
+                    or (name == self.documentation_name and self.documentation)
+                    or (name in (self.show_previous_name, self.show_more_name) and self.window_size)
+                    or (self.item_source is not None and self.item_source.find(name) is not None)
+                ):
+                    with self.instrumentation.phase("state_transition"):
+                        await self.load_item(name)
+                        active_page = self.select(name, state)
+                        await self.load_expanded(state)
+                    state.events += 1
+                    state.event_at = time.monotonic()
+                    return active_page
+        return None
+
+    async def coalesce(self, state: Optional[SideMenuState] = None) -> bool:
+        """Waits coalesce_delay seconds after a sidebar event for more events of the client, e.g. a double click of
+        the collapse button. Returns False if another event was handled meanwhile: the request handling it renders
+        the final state, so rendering and saving the page can be skipped. Returns True right away if coalesce_delay
+        isn't set or the request didn't handle a sidebar event. Rapid events still apply their state transitions,
+        only the rendering is merged, so render returns False when their net effect is nothing (e.g. two toggles).
+        Since handle_click has just recorded the event, every click is rendered coalesce_delay seconds later,
+        including single clicks: it trades that latency for fewer renders under rapid clicks."""
+        state = state or self.state
+        if not self.coalesce_delay:
+            return True
+        remaining = state.event_at + self.coalesce_delay - time.monotonic()
+        if remaining <= 0:
+            return True
+        events = state.events
+        await asyncio.sleep(remaining)
+        if state.events != events:
+            self.instrumentation.count("coalesced_events")
+            return False
+        return True
+
+    def is_rendered(self, item: SideMenuItem, state: Optional[SideMenuState] = None) -> bool:
+        """Returns True if the item is rendered for the state.
+        Sub items are rendered when their render flag is set or their parent item is expanded.
+        Deeper sub items are rendered only if their parent item is rendered too.
+        Items hidden from the roles of the state aren't rendered."""
+        if item.name in self._hidden(state or self.state):
+            return False
+        parent = self._parents.get(item.name)
+        if parent is None:
+            return bool(item.render)
+        if not item.render and parent.name not in (state or self.state).expanded:
+            return False
+        return parent.name not in self._parents or self.is_rendered(parent, state)
+
+    @property
+    def layout(self) -> Zone:
+        """Return layout based on the width"""
+        return self.get_layout()
+
+    def get_layout(self, state: Optional[SideMenuState] = None) -> Zone:
+        """Return layout based on the width for the state"""
+        return ui.zone("sidebar", direction=ui.ZoneDirection.COLUMN, size=self.get_width(state))
+
+    @property
+    def auto_width(self) -> bool:
+        return self._auto_width
+
+    @property
+    def min_width(self) -> int:
+        return self._min_width
+
+    @property
+    def max_width(self) -> int:
+        return self._max_width
+
+    @property
+    def width(self) -> str:
+        """Return width based on the collapsed state"""
+        return self.get_width()
+
+    @width.setter
+    def width(self, value: List[str]):
+        self._width = value
+        self.invalidate()  # Widths are cached with the nav content
+
+    def get_width(self, state: Optional[SideMenuState] = None) -> str:
+        """Return width based on the collapsed state of the state"""
+        state = state or self.state
+        if self.auto_width and not state.collapsed:
+            with self.instrumentation.phase("width"):
+                # Width is based on the longest rendered label, which is kept up-to-date as items change.
+                # Only sub items of the expanded items are added to the always rendered ones.
+                # Items hidden from the roles of the state are left out.
+                hidden = self._hidden(state)
+                children_widths = [
+                    self._children_widths[name]
+                    if not hidden
+                    else self._visible_children_width(name, hidden)
+                    for name in state.expanded
+                    if name in self._children_widths
+                    and (name not in self._parents or self.is_rendered(self._index[name], state))
+                    and (not hidden or self.is_visible(name, state))
+                ]
+                # None for expanded items whose sub items are all hidden
+                label_lengths: List[int] = [width for width in children_widths if width is not None]
+                static_width = self._static_width(hidden)
+                if static_width is not None:
+                    label_lengths.append(static_width)
+
+                if len(label_lengths) > 0:
+                    width = min(max(200 + max(label_lengths), self.min_width), self.max_width)
+                    return f"{width}px"
+        return self._width[state.collapsed]
+
+    def _static_width(self, hidden: FrozenSet[str]) -> Optional[int]:
+        """Returns the widest always rendered item, leaving out the hidden items and their sub items.
+        Computed once per set of hidden items."""
+        if not hidden:
+            return max(self._static_widths) if len(self._static_widths) > 0 else None
+        if hidden not in self._role_widths:
+            widths = self._static_widths.copy()
+            stack = [
+                self._index[name]
+                for name in hidden
+                if all(parent.name not in hidden for parent in self.get_ancestors(name))
+            ]
+            while stack:
+                item = stack.pop()
+                if item.name in self._rendered_widths:
+                    widths[self._rendered_widths[item.name]] -= 1
+                stack.extend(item.sub_items)
+            self._role_widths[hidden] = max(
+                (width for width, count in widths.items() if count > 0), default=None
+            )
+        return self._role_widths[hidden]
+
+    def _visible_children_width(self, name: str, hidden: FrozenSet[str]) -> Optional[int]:
+        """Returns the widest sub item of the item, leaving out the hidden ones"""
+        return max(
+            (
+                self._branch_width(item, hidden)
+                for item in self._index[name].sub_items
+                if item.name not in hidden
+            ),
+            default=None,
+        )
+
+    @property
+    def height(self) -> str:
+        return self._height
+
+    @height.setter
+    def height(self, value: str):
+        self._height = value
+
+    @property
+    def badge_format(self) -> str:
+        return self._badge_format
+
+    @badge_format.setter
+    def badge_format(self, value: str):
+        self._badge_format = value
+        self.reindex()  # Widths of the items with a badge change, and labels are cached with the nav content
+
+    @property
+    def documentation_icon(self) -> str:
+        return self._documentation_icon
+
+    @property
+    def documentation_label(self) -> str:
+        return self._documentation_label
+
+    @property
+    def collapse_button_icon(self) -> str:
+        return self._collapse_button_icon[self.collapsed]
+
+    @collapse_button_icon.setter
+    def collapse_button_icon(self, value: List[str]):
+        self._collapse_button_icon = value
+        self.invalidate()
+
+    @property
+    def collapsed_item_label(self) -> str:
+        return self._collapsed_item_label
+
+    @collapsed_item_label.setter
+    def collapsed_item_label(self, value: str):
+        self._collapsed_item_label = value
+        self.invalidate()
+
+    @property
+    def collapsed_group_label(self) -> str:
+        return self._collapsed_group_label
+
+    @collapsed_group_label.setter
+    def collapsed_group_label(self, value: str):
+        self._collapsed_group_label = value
+        self.invalidate()
+
+    @property
+    def show_previous_label(self) -> str:
+        return self._show_previous_label
+
+    @show_previous_label.setter
+    def show_previous_label(self, value: str):
+        self._show_previous_label = value
+        self.invalidate()
+
+    @property
+    def show_more_label(self) -> str:
+        return self._show_more_label
+
+    @show_more_label.setter
+    def show_more_label(self, value: str):
+        self._show_more_label = value
+        self.invalidate()
+
+    @property
+    def collapsed_sub_item_icon(self) -> str:
+        return self._collapsed_sub_item_icon
+
+    @collapsed_sub_item_icon.setter
+    def collapsed_sub_item_icon(self, value: str):
+        self._collapsed_sub_item_icon = value
+        self.invalidate()
+
+    @property
+    def sub_item_label_start(self) -> str:
+        return self._sub_item_label_start
+
+    @sub_item_label_start.setter
+    def sub_item_label_start(self, value: str):
+        self._sub_item_label_start = value
+        self.invalidate()
+
+    def groups(self):
+        """Returns list of groups from the items"""
+        return list(self._groups)
+
+    def group_items(self, group):
+        """Returns list of items from the items based on the group"""
+        return list(self._groups.get(group, []))
+
+    def get_label(self, item: SideMenuItem, state: Optional[SideMenuState] = None):
+        """For display purposes, returns label based on the state of collapsed.
+        If collapsed, returns collapsed_item_label instead of item.label"""
+        return (
+            self.collapsed_item_label
+            if (state or self.state).collapsed
+            else self._badged_label(item)
+        )
+
+    def _badged_label(self, item: SideMenuItem) -> str:
+        """Returns label of the item with its badge, if it has one"""
+        if item.badge is None:
+            return item.label
+        return self.badge_format.format(label=item.label, badge=item.badge)
+
+    def get_icon(self, item: SideMenuItem, state: Optional[SideMenuState] = None):
+        """For display purposes, returns icon based on the state of collapsed and active_item_label.
+        If collapsed, always render original icon. If not collapsed, render expanded icon when the item is expanded."""
+        state = state or self.state
+        if state.collapsed:
+            # Always render original icon when menu is collapsed
+            return item.icon
+        if item.name in state.expanded or (item.name == state.active_root and item.expand_always):
+            # Render expanded icon when the item is expanded
+            return item.expanded_icon
+        return item.icon
+
+    def get_sub_label(self, item: SideMenuItem, depth: int = 1):
+        """Returns label of the sub item, indented for each level below the first one"""
+        return (
+            f"{chr(0xA0) * 2 * (depth - 1)} {self.sub_item_label_start} {self._badged_label(item)}"
+        )
+
+    def get_sub_icon(self, item: SideMenuItem, state: Optional[SideMenuState] = None):
+        state = state or self.state
+        if state.collapsed:
+            return self.collapsed_sub_item_icon
+        return item.expanded_icon if item.name in state.expanded else item.icon
+
+    def render_group_items(self, group: Optional[str], state: Optional[SideMenuState] = None):
+        """For display purposes, returns views of the items based on the state of collapsed and active_item_label.
+        Sub items of the expanded items are listed after their parent item, at any depth.
+        Items hidden from the roles of the state are left out with their sub items."""
+        state = state or self.state
+        hidden = self._hidden(state)
+        group_items: List[SideMenuItemView] = []
+        for item in self._groups.get(group, []):
+            if item.name in hidden:
+                continue
+            if item.render:
+                group_items.append(
+                    SideMenuItemView(
+                        item.name,
+                        self.get_label(item, state),
+                        self.get_icon(item, state),
+                        item.disabled,
+                        item.group,
+                    )
+                )
+            self._render_sub_items(item, 1, state, group_items, hidden)
+        return group_items
+
+    def _render_sub_items(
+        self,
+        item: SideMenuItem,
+        depth: int,
+        state: SideMenuState,
+        group_items: List[SideMenuItemView],
+        hidden: FrozenSet[str] = frozenset(),
+    ):
+        """Appends views of the rendered sub items of the item, each followed by its own rendered sub items.
+        Only the sub items of rendered items are visited, so collapsed subtrees cost nothing."""
+        expanded = item.name in state.expanded
+        for sub_item in item.sub_items:
+            if (sub_item.render or expanded) and sub_item.name not in hidden:
+                group_items.append(
+                    SideMenuItemView(
+                        sub_item.name,
+                        self.get_sub_label(sub_item, depth),
+                        self.get_sub_icon(sub_item, state),
+                        sub_item.disabled,
+                        sub_item.group,
+                    )
+                )
+                if len(sub_item.sub_items) > 0:
+                    self._render_sub_items(sub_item, depth + 1, state, group_items, hidden)
+
+    def _fingerprint(self, state: SideMenuState) -> Tuple:
+        """Returns a key of everything the nav content depends on for the state, except the collapsed flag.
+        Both the collapsed and the un-collapsed contents are cached under the key."""
+        return (
+            self._version,
+            self._expanded_root(state),
+            frozenset(state.expanded),
+            self.disable_group_names,
+            self.documentation,
+            self.collapsable,
+            state.window_start if self.window_size else None,
+            state.filter,
+            self._hidden(state),
+        )
+
+    def _expanded_root(self, state: SideMenuState) -> Optional[str]:
+        """Returns the active root item if it's rendered with the expanded icon (when the menu isn't collapsed)
+        only because of expand_always"""
+        active_root = state.active_root
+        if active_root not in self._index or active_root in state.expanded:
+            return None
+        return active_root if self._index[active_root].expand_always else None
+
+    def get_nav_content(self, q: Q, state: Optional[SideMenuState] = None):
+        """Returns wave navigation content based on the state of collapsed and items.
+        If state is not passed, the default state of the SideMenu is used.
+        Content is cached per state, so the returned list is shared and must not be modified."""
+        return self._nav_variant(state or self.state)[0]
+
+    def _nav_variant(self, state: SideMenuState) -> Tuple[list, str]:
+        """Returns the nav content and the width for the state.
+        On a cache miss the contents and widths of both the collapsed and the un-collapsed state are built
+        (if the menu is collapsable), so toggle_state only swaps between two cached variants."""
+        with self.instrumentation.phase("nav_content"):
+            if self.window_size and state.window_item is not None:
+                self._move_window(state)
+            key = self._fingerprint(state)
+            variants = self._render_cache.get(key)
+            if variants is not None and variants[state.collapsed] is not None:
+                self._render_cache.move_to_end(key)
+                self.instrumentation.count("render_cache_hits")
+                return variants[state.collapsed]
+
+            if variants is None:
+                variants = self._render_cache[key] = [None, None]  # Indexed by the collapsed flag
+                if len(self._render_cache) > self._render_cache_size:
+                    self._render_cache.popitem(last=False)
+            built = [state]
+            if self.collapsable and variants[not state.collapsed] is None:
+                built.append(self._toggled_state(state))
+            for variant_state in built:
+                variants[variant_state.collapsed] = (
+                    self._build_nav_content(variant_state),
+                    self.get_width(variant_state),
+                )
+        if self.instrumentation.enabled:
+            self.instrumentation.count("render_cache_misses")
+            for variant_state in built:
+                contents = variants[variant_state.collapsed][0]
+                self.instrumentation.count(
+                    "items_rendered", sum(len(group.items) for group in contents)
+                )
+                self.instrumentation.count(
+                    "nav_content_bytes", len(json.dumps([group.dump() for group in contents]))
+                )
+        return variants[state.collapsed]
+
+    @staticmethod
+    def _toggled_state(state: SideMenuState) -> SideMenuState:
+        """Returns a copy of the state with the collapsed flag toggled, used to build the other variant"""
+        toggled = SideMenuState(not state.collapsed, state.active_root, state.expanded)
+        toggled.window_start = state.window_start
+        toggled.filter = state.filter
+        toggled.roles = state.roles
+        return toggled
+
+    def _build_nav_content(self, state: SideMenuState):
+        """Builds wave navigation content for the state"""
+        contents = self._nav_groups(state)
+        if self.window_size:
+            contents = self._window(contents, state)
+
+        if self.collapsable:
+            # Add collapse item into a new group of items to place it as the last item in the menu
+            contents = contents + [
+                ui.nav_group(
+                    "",
+                    items=[
+                        ui.nav_item(
+                            name=self.toggle_collapse_name,
+                            label="",
+                            icon=self._collapse_button_icon[state.collapsed],
+                        )
+                    ],
+                )
+            ]
+        return contents
+
+    def _row_count(self, state: SideMenuState) -> int:
+        """Returns the number of rows for the state, the items and the documentation item"""
+        return sum(len(group.items) for group in self._nav_groups(state))
+
+    def _move_window(self, state: SideMenuState):
+        """Moves the window of the state to have its window_item in the middle, if it's out of the window"""
+        size: int = self.window_size  # type: ignore
+        name, state.window_item = state.window_item, None
+        row = 0
+        for group in self._nav_groups(state):
+            for item in group.items:
+                if item.name == name:
+                    if not state.window_start <= row < state.window_start + size:
+                        state.window_start = max(0, row - size // 2)
+                    return
+                row += 1
+
+    def _window(self, groups: list, state: SideMenuState) -> list:
+        """Returns the groups cut to the window_size rows starting at the window start of the state,
+        with items to move the window before and after them if there are more rows"""
+        size: int = self.window_size  # type: ignore
+        total = sum(len(group.items) for group in groups)
+        start = min(state.window_start, max(0, total - size))
+        end = start + size
+        windowed = []
+        if start > 0:
+            windowed.append(
+                self._window_group(
+                    self.show_previous_name, self.show_previous_label, "ChevronUpMed", state
+                )
+            )
+        row = 0
+        for group in groups:
+            count = len(group.items)
+            if row + count > start and row < end:
+                if start <= row and row + count <= end:
+                    windowed.append(group)  # Shared with the group cache
+                else:
+                    items = group.items[max(0, start - row) : end - row]
+                    windowed.append(ui.nav_group(label=group.label, items=items))
+            row += count
+        if end < total:
+            windowed.append(
+                self._window_group(
+                    self.show_more_name, self.show_more_label, "ChevronDownMed", state
+                )
+            )
+        return windowed
+
+    def _window_group(self, name: str, label: str, icon: str, state: SideMenuState):
+        """Returns a group with the item moving the window"""
+        label = self.collapsed_item_label if state.collapsed else label
+        return ui.nav_group("", items=[ui.nav_item(name=name, label=label, icon=icon)])
+
+    def _nav_groups(self, state: SideMenuState) -> list:
+        """Returns the nav groups of the items (and the documentation item) for the state.
+        Groups are cached by the expanded items within them, so expanding an item renders only its group.
+        If the state has a filter, only the matching items are rendered and there is no documentation item."""
+        if state.filter:
+            return self._filtered_groups(state)
+
+        expanded_by_group: Dict[Optional[str], Set[str]] = {}
+        for name in state.expanded:
+            root = self.get_root_item(name) or self._index.get(name)
+            if root is not None:
+                expanded_by_group.setdefault(root.group, set()).add(name)
+        expanded_root = self._expanded_root(state)
+        expanded_root_group = None if expanded_root is None else self._index[expanded_root].group
+        hidden = self._hidden(state)
+
+        contents = []
+        for group in self._groups:
+            key = (
+                group,
+                state.collapsed,
+                frozenset(expanded_by_group.get(group, ())),
+                expanded_root if expanded_root_group == group else None,
+                self.disable_group_names,
+                hidden,  # Groups are shared by the users with the same visible items
+            )
+            nav_group = self._group_cache.get(key)
+            if nav_group is None:
+                nav_group = self._group_cache[key] = self._build_nav_group(group, state)
+                # Contents in the render cache (two variants each) refer to a group each at most, keep them all
+                if len(self._group_cache) > 2 * self._render_cache_size * len(self._groups):
+                    self._group_cache.popitem(last=False)
+            else:
+                self._group_cache.move_to_end(key)
+            if (
+                hidden
+                and len(nav_group.items) == 0
+                and all(item.name in hidden for item in self._groups[group])
+            ):
+                continue  # All the items of the group are hidden from the roles of the state
+            contents.append(nav_group)
+
+        if self.documentation and len(contents) > 0:
+            # Add documentation item into a copy of the last group of items, which is shared through the cache
+            contents[-1] = ui.nav_group(
+                label=contents[-1].label,
+                items=contents[-1].items
+                + [
+                    ui.nav_item(
+                        name=self.documentation_name,
+                        label=self.documentation_label,
+                        icon=self.documentation_icon,
+                    )
+                ],
+            )
+        return contents
+
+    def _filtered_groups(self, state: SideMenuState) -> list:
+        """Returns the nav groups of the items matching the filter of the state, each after its ancestors.
+        Matches are looked up in the search index, only the ancestors and the top-level items are visited."""
+        matches = self._find(state.filter)  # type: ignore
+        if self._hidden(state):
+            matches = {name for name in matches if self.is_visible(name, state)}
+        shown = set(matches)
+        for name in matches:
+            parent = self._parents.get(name)
+            while parent is not None and parent.name not in shown:
+                shown.add(parent.name)
+                parent = self._parents.get(parent.name)
+
+        contents = []
+        for group, items in self._groups.items():
+            views: List[SideMenuItemView] = []
+            for item in items:
+                if item.name in shown:
+                    self._filtered_items(item, 0, matches, shown, state, views)
+            if len(views) > 0:
+                contents.append(
+                    ui.nav_group(
+                        label=self.collapsed_group_label if self.disable_group_names else group,
+                        items=[
+                            ui.nav_item(
+                                name=view.name,
+                                label=view.label,
+                                icon=view.icon,
+                                disabled=view.disabled,
+                            )
+                            for view in views
+                        ],
+                    )
+                )
+        return contents
+
+    def _filtered_items(
+        self,
+        item: SideMenuItem,
+        depth: int,
+        matches: Set[str],
+        shown: Set[str],
+        state: SideMenuState,
+        group_items: List[SideMenuItemView],
+    ):
+        """Appends the view of the item, then the views of its shown sub items.
+        Ancestors shown only for their matching descendants get the expanded icon."""
+        if depth == 0:
+            label, icon = self.get_label(item, state), self.get_icon(item, state)
+        else:
+            label, icon = self.get_sub_label(item, depth), self.get_sub_icon(item, state)
+        if item.name not in matches and not state.collapsed:
+            icon = item.expanded_icon
+        group_items.append(SideMenuItemView(item.name, label, icon, item.disabled, item.group))
+        for sub_item in item.sub_items:
+            if sub_item.name in shown:
+                self._filtered_items(sub_item, depth + 1, matches, shown, state, group_items)
+
+    def _build_nav_group(self, group: Optional[str], state: SideMenuState):
+        return ui.nav_group(
+            label=self.collapsed_group_label if self.disable_group_names else group,
+            items=[
+                ui.nav_item(
+                    name=item.name,
+                    label=item.label,
+                    icon=item.icon,
+                    disabled=item.disabled,
+                )
+                for item in self.render_group_items(group=group, state=state)
+            ],
+        )
+
+    def render(
+        self,
+        q: Q,
+        state: Optional[SideMenuState] = None,
+        value: Optional[str] = None,
+        card_name: str = "sidemenu",
+    ) -> bool:
+        """Renders the nav card into q.page.
+        The whole card is sent only the first time. Afterwards only the attributes changed since the last render
+        of the state are sent, e.g. value, icon of an item or the width.
+        The page is kept in the state, so apply_changes can update the card of a connected client.
+        Hold state.lock until the page is saved, broadcast renders the changes of the client under it too.
+        Returns True if anything was set into the page."""
+        state = state or self.state
+        state.page = q.page
+        state.card_name = card_name
+        self._clients.add(state)
+        return self._render_page(q.page, state, value, card_name)
+
+    def _render_page(
+        self,
+        page: AsyncPage,
+        state: SideMenuState,
+        value: Optional[str],
+        card_name: str,
+        nav_changes: Optional[Dict[Tuple[int, int], list]] = None,
+    ) -> bool:
+        """Sets the nav card, or the attributes changed since the last render of the state, into the page.
+        Changes between two nav contents are kept in nav_changes if it's passed, so clients sharing the
+        same contents don't compare them again."""
+        items, width = self._nav_variant(state)
+        changed = False
+        if state.sent_items is None:
+            page[card_name] = ui.nav_card(
+                box=ui.box(zone="sidebar", width=width, height=self.height),
+                items=items,
+                value=value,
+            )
+            changed = True
+        else:
+            card = page[card_name]
+            if items is not state.sent_items:
+                key = (id(state.sent_items), id(items))
+                changes = None if nav_changes is None else nav_changes.get(key)
+                if changes is None:
+                    changes = self._nav_changes(state.sent_items, items)
+                    if nav_changes is not None:
+                        nav_changes[key] = changes
+                self._send_nav_changes(card, changes)
+                changed = len(changes) > 0
+            if width != state.sent_width:
+                card.box = ui.box(zone="sidebar", width=width, height=self.height)
+                changed = True
+            if value != state.sent_value:
+                card.value = value
+                changed = True
+        state.sent_items = items
+        state.sent_width = width
+        state.sent_value = value
+        return changed
+
+    @staticmethod
+    def _nav_changes(
+        old_items: list, new_items: list
+    ) -> List[Tuple[Optional[int], Optional[int], str, Any]]:
+        """Returns the changes between two nav contents as (group, item, attribute, value) tuples.
+        Group and item are None when all the groups or a whole group is replaced, which are dumped once here
+        instead of for each card they are sent to."""
+        if len(old_items) != len(new_items):
+            return [(None, None, "items", [group.dump() for group in new_items])]
+        changes: List[Tuple[Optional[int], Optional[int], str, Any]] = []
+        for g, (old_group, new_group) in enumerate(zip(old_items, new_items)):
+            if old_group is new_group:  # Same group from the group cache
+                continue
+            if [item.name for item in old_group.items] != [item.name for item in new_group.items]:
+                changes.append(
+                    (g, None, "items", new_group.dump())
+                )  # Different items, replace the group
+                continue
+            group_changes = [
+                (g, i, attr, getattr(new_item, attr))
+                for i, (old_item, new_item) in enumerate(zip(old_group.items, new_group.items))
+                for attr in ("label", "icon", "disabled")
+                if getattr(old_item, attr) != getattr(new_item, attr)
+            ]
+            if 2 * len(group_changes) > len(
+                new_group.items
+            ):  # e.g. collapsing, cheaper to replace the group
+                changes.append((g, None, "items", new_group.dump()))
+                continue
+            if old_group.label != new_group.label:
+                changes.append((g, None, "label", new_group.label))
+            changes.extend(group_changes)
+        return changes
+
+    @staticmethod
+    def _send_nav_changes(card, changes: List[Tuple[Optional[int], Optional[int], str, Any]]):
+        """Sets the changed nav groups and nav item attributes into the card reference"""
+        for g, i, attr, value in changes:
+            if g is None:
+                card.items = value
+            elif attr == "items":
+                card.items[g] = value
+            elif i is None:
+                setattr(card.items[g], attr, value)
+            else:
+                setattr(card.items[g].items[i], attr, value)
+
+    def layout_changed(self, state: Optional[SideMenuState] = None) -> bool:
+        """Returns True if the width of the layout changed since the last call for the state,
+        i.e. the layout needs to be sent to the client again"""
+        state = state or self.state
+        width = self.get_width(state)
+        if width == state.sent_layout_width:
+            return False
+        state.sent_layout_width = width
+        return True
+
+    def update_zone_layout(self, q: Q):
+        pass
+        # q.page["meta"].layouts = update_app_layouts(self.layout)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}"
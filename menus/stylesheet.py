@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import hashlib
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from h2o_wave import Q, ui
+
+STYLESHEET_PATH: Path = Path(__file__).with_name("side_menu.css")  # CSS shipped with the package.
+
+
+@lru_cache(maxsize=None)
+def stylesheet_filename() -> str:
+    """Returns the file name the stylesheet is published with, containing the hash of its content.
+    Browsers can cache it forever, since a changed stylesheet is published under a new name."""
+    digest = hashlib.sha256(STYLESHEET_PATH.read_bytes()).hexdigest()[:16]
+    return f"side_menu.{digest}.css"
+
+
+async def publish_stylesheet(q: Q) -> ui.Stylesheet:
+    """Uploads the SideMenu stylesheet to the Wave server once per app and returns a link to it,
+    to be passed in the stylesheets of the meta card instead of sending the CSS with the page"""
+    if q.app.side_menu_stylesheet is None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, stylesheet_filename())
+            shutil.copyfile(STYLESHEET_PATH, path)
+            (q.app.side_menu_stylesheet,) = await q.site.upload([str(path)])
+    return ui.stylesheet(path=q.app.side_menu_stylesheet)
@@ -0,0 +1,602 @@
+import asyncio
+import copy
+import json
+import pickle
+from typing import Dict, List, Set
+
+import pytest
+from h2o_wave import Expando
+from h2o_wave.core import AsyncPage
+
+from menus import (
+    BadgeUpdater,
+    HistogramSink,
+    Instrumentation,
+    PageRegistry,
+    SideMenu,
+    SideMenuItem,
+    SideMenuState,
+    open_shared,
+    save_shared,
+)
+
+
+class StubSite:
+    """Stands in for the Wave site, keeps the patches saved per page url"""
+
+    def __init__(self):
+        self.patches: Dict[str, List[dict]] = {}
+        self.failing: Set[str] = set()  # Urls whose saves fail.
+
+    async def _save(self, url: str, patch: str):
+        if url in self.failing:
+            raise ConnectionError(f"{url} is gone")
+        self.patches.setdefault(url, []).append(json.loads(patch))
+
+
+class StubQ:
+    def __init__(self, site: StubSite, url: str):
+        self.args = Expando()
+        self.client = Expando()
+        self.page = AsyncPage(site, url)
+
+
+def build_menu() -> SideMenu:
+    return SideMenu(
+        items=[
+            SideMenuItem(
+                name="home",
+                label="Home",
+                group="Main",
+                render=True,
+                sub_items=[
+                    SideMenuItem(
+                        name="sub1",
+                        label="Sub 1",
+                        sub_items=[SideMenuItem(name="sub2", label="Sub 2")],
+                    )
+                ],
+            ),
+            SideMenuItem(name="about", label="About", group="Main", render=True),
+            SideMenuItem(name="help", label="Help", group="Other", render=True),
+        ],
+        multi_expand=True,
+    )
+
+
+def connect(side_menu: SideMenu, site: StubSite, url: str, expanded=()) -> SideMenuState:
+    """Renders the nav card of a new client and saves its page.
+    States of the clients are referenced weakly by the menu, so tests keep the returned state."""
+    state = side_menu.new_state()
+    for name in expanded:
+        side_menu.select(name, state)
+    q = StubQ(site, url)
+    side_menu.render(q, state)
+    asyncio.run(q.page.save())
+    return state
+
+
+def labels(side_menu: SideMenu, state: SideMenuState) -> str:
+    return "\n".join(
+        item.label for group in side_menu.get_nav_content(None, state) for item in group.items
+    )
+
+
+def rendered(side_menu: SideMenu, state: SideMenuState) -> List[str]:
+    """Names of the rendered items, without the collapse button"""
+    return [
+        item.name
+        for group in side_menu.get_nav_content(None, state)
+        for item in group.items
+        if item.name != side_menu.toggle_collapse_name
+    ]
+
+
+def snapshot(side_menu: SideMenu):
+    return (
+        sorted(side_menu._index),
+        {name: parent.name for name, parent in side_menu._parents.items()},
+        {group: [item.name for item in items] for group, items in side_menu._groups.items()},
+        [item.name for item in side_menu.items],
+    )
+
+
+def test_apply_changes():
+    side_menu = build_menu()
+    state = side_menu.new_state()
+    side_menu.select("sub1", state)
+    asyncio.run(
+        side_menu.apply_changes(
+            remove=["about"],
+            move={"sub2": (None, None)},
+            add=[
+                (SideMenuItem(name="reports", label="Reports", group="New", render=True), None, 0)
+            ],
+            update={"help": dict(label="Support")},
+        )
+    )
+    assert side_menu.get_item("about") is None
+    assert side_menu.get_depth("sub2") == 0
+    assert [item.name for item in side_menu.items] == ["reports", "home", "help", "sub2"]
+    assert list(side_menu._groups) == ["New", "Main", "Other", None]
+    assert "Support" in labels(side_menu, state)
+    assert "About" not in labels(side_menu, state)
+
+
+def test_apply_changes_moves_under_moved_item():
+    side_menu = build_menu()
+    asyncio.run(side_menu.apply_changes(move={"sub1": (None, None), "home": ("sub2", None)}))
+    assert [item.name for item in side_menu.get_ancestors("home")] == ["sub1", "sub2"]
+
+
+def test_apply_changes_drops_removed_items_from_states():
+    side_menu = build_menu()
+    state = connect(side_menu, StubSite(), "/client", expanded=["sub1"])
+    asyncio.run(side_menu.apply_changes(remove=["home"]))
+    assert state.expanded == set()
+    assert state.active_root is None
+
+
+@pytest.mark.parametrize(
+    "changes, error",
+    [
+        (dict(remove=["about"], add=[(SideMenuItem("home", "Home"), None, None)]), ValueError),
+        (
+            dict(
+                add=[
+                    (SideMenuItem("new", "New", sub_items=[SideMenuItem("new", "New")]), None, None)
+                ]
+            ),
+            ValueError,
+        ),
+        (dict(move={"home": ("sub2", None)}), ValueError),
+        (dict(move={"about": ("sub2", None), "home": ("about", None)}), ValueError),
+        (dict(remove=["home", "sub1"]), KeyError),
+        (dict(remove=["unknown"]), KeyError),
+        (dict(add=[(SideMenuItem("new", "New"), "about_us", None)]), KeyError),
+        (dict(remove=["about"], update={"about": dict(label="About us")}), KeyError),
+        (dict(update={"about": dict(lable="About us")}), AttributeError),
+        (dict(update={"about": dict(name="help")}), ValueError),
+        (dict(update={"about": dict(label="About us", name="about_us")}), ValueError),
+        (dict(update={"about": dict(sub_items=[SideMenuItem("home", "Home")])}), ValueError),
+    ],
+)
+def test_apply_changes_is_atomic(changes, error):
+    side_menu = build_menu()
+    state = side_menu.new_state()
+    before, rendered = snapshot(side_menu), labels(side_menu, state)
+    with pytest.raises(error):
+        asyncio.run(side_menu.apply_changes(**changes))
+    assert snapshot(side_menu) == before
+    assert labels(side_menu, state) == rendered
+
+
+def test_update_only_sends_changed_items_to_clients_showing_them():
+    side_menu = build_menu()
+    site = StubSite()
+    expanded = connect(side_menu, site, "/expanded", expanded=["sub1"])
+    collapsed = connect(side_menu, site, "/collapsed")
+    site.patches.clear()
+
+    updated = asyncio.run(side_menu.apply_changes(update={"sub2": dict(label="Sub X")}))
+
+    assert updated == 1
+    assert list(site.patches) == ["/expanded"]
+    (patch,) = site.patches["/expanded"]
+    assert [change["k"] for change in patch["d"]] == ["sidemenu items 0 items 2 label"]
+    assert "Sub X" in labels(side_menu, expanded)
+    assert "Sub X" not in labels(side_menu, collapsed)
+
+
+def test_structure_change_is_sent_to_all_clients():
+    side_menu = build_menu()
+    site = StubSite()
+    states = [connect(side_menu, site, "/a", expanded=["sub1"]), connect(side_menu, site, "/b")]
+    site.patches.clear()
+
+    updated = asyncio.run(side_menu.apply_changes(remove=["help"]))
+
+    assert updated == 2
+    assert sorted(site.patches) == ["/a", "/b"]
+    assert all("Help" not in labels(side_menu, state) for state in states)
+
+
+def test_broadcast_skips_clients_not_showing_changes():
+    side_menu = build_menu()
+    site = StubSite()
+    state = connect(side_menu, site, "/a")
+    site.patches.clear()
+
+    side_menu.get_item("sub2").label = "Hidden change"
+    assert asyncio.run(side_menu.broadcast()) == 0
+    assert site.patches == {}
+    assert asyncio.run(side_menu.broadcast()) == 0  # Nothing changed since the last broadcast
+    assert state.sent_items is not None
+
+
+def test_broadcast_failed_save_resends_whole_card(caplog):
+    side_menu = build_menu()
+    site = StubSite()
+    failing = connect(side_menu, site, "/failing")
+    working = connect(side_menu, site, "/working")
+    site.patches.clear()
+    site.failing.add("/failing")
+
+    side_menu.get_item("about").label = "Changed"
+    assert asyncio.run(side_menu.broadcast()) == 1
+    assert list(site.patches) == ["/working"]
+    assert "Sending side menu changes failed" in caplog.text
+    assert failing.sent_items is None
+    assert working.sent_items is not None
+
+    site.failing.clear()
+    q = StubQ(site, "/failing")
+    assert side_menu.render(q, failing)
+    asyncio.run(q.page.save())
+    (patch,) = site.patches["/failing"]
+    assert patch["d"][0]["d"]["view"] == "nav"  # The whole card, not only the changed label
+    assert "Changed" in json.dumps(patch)
+
+
+def test_broadcast_skips_failed_client_until_it_renders():
+    side_menu = build_menu()
+    site = StubSite()
+    state = connect(side_menu, site, "/failing")
+    site.patches.clear()
+    site.failing.add("/failing")
+    side_menu.get_item("about").label = "Changed"
+    assert asyncio.run(side_menu.broadcast()) == 0
+
+    site.failing.clear()
+    side_menu.get_item("about").label = "Changed again"
+    assert asyncio.run(side_menu.broadcast()) == 0
+    assert site.patches == {}
+    assert state.sent_items is None
+
+
+def test_items_cant_be_changed_in_place():
+    items = [SideMenuItem(name="home", label="Home", render=True)]
+    side_menu = SideMenu(items=items)
+    with pytest.raises(AttributeError):
+        side_menu.items.append(SideMenuItem(name="about", label="About", render=True))
+    items.append(SideMenuItem(name="about", label="About", render=True))
+    assert [item.name for item in side_menu.items] == ["home"]  # The menu keeps its own list
+
+    side_menu.add_item(SideMenuItem(name="about", label="About", render=True))
+    assert side_menu.get_item("about") is not None
+    assert "About" in labels(side_menu, side_menu.new_state())
+
+
+def test_provider_returning_used_name_keeps_menu_intact(caplog):
+    side_menu = build_menu()
+    side_menu.get_item("about").sub_items_provider = lambda: [SideMenuItem("help", "Help 2")]
+    state = side_menu.new_state()
+    before, rendered = snapshot(side_menu), labels(side_menu, state)
+
+    assert asyncio.run(side_menu.load_sub_items("about")) is False
+    assert "Loading sub items of 'about' failed" in caplog.text
+    assert snapshot(side_menu) == before
+    assert side_menu.get_item("help").label == "Help"
+    assert labels(side_menu, state) == rendered
+
+
+@pytest.mark.parametrize(
+    "clone", [copy.copy, copy.deepcopy, lambda item: pickle.loads(pickle.dumps(item))]
+)
+def test_items_can_be_copied_and_pickled(clone):
+    side_menu = build_menu()
+    item = side_menu.get_item("home")
+    cloned = clone(item)
+    assert cloned == item
+    cloned.label = "Start"  # Only the menus of the original item are notified
+    assert item.label == "Home"
+    assert "Home" in labels(side_menu, side_menu.new_state())
+
+
+@pytest.mark.parametrize("clone", [copy.deepcopy, lambda menu: pickle.loads(pickle.dumps(menu))])
+def test_menu_can_be_copied_and_pickled(clone):
+    side_menu = build_menu()
+    state = connect(side_menu, StubSite(), "/client", expanded=["sub1"])
+    cloned = clone(side_menu)
+    assert snapshot(cloned) == snapshot(side_menu)
+    assert labels(cloned, state) == labels(side_menu, state)
+
+    cloned.get_item("sub2").label = "Sub X"  # The clone owns its own items
+    assert "Sub X" in labels(cloned, state)
+    assert "Sub X" not in labels(side_menu, state)
+    assert list(cloned._clients) == []
+
+
+def test_sub_items_default_is_shared_tuple():
+    side_menu = build_menu()
+    about = side_menu.get_item("about")
+    with pytest.raises(AttributeError):
+        about.sub_items.append(SideMenuItem(name="team", label="Team"))  # type: ignore
+    side_menu.add_item(SideMenuItem(name="team", label="Team"), parent="about")
+    assert [item.name for item in about.sub_items] == ["team"]
+    assert side_menu.get_parent_item("team") is about
+
+
+def test_broadcast_sends_width_of_items_out_of_the_window():
+    side_menu = SideMenu(
+        items=[SideMenuItem(name=f"i{i}", label=f"Item {i}", render=True) for i in range(10)],
+        window_size=3,
+    )
+    site = StubSite()
+    state = connect(side_menu, site, "/a")
+    site.patches.clear()
+
+    side_menu.get_item("i9").label = "A label much longer than all the other labels of the menu"
+    assert asyncio.run(side_menu.broadcast()) == 1
+    assert state.sent_width == side_menu.get_width(state) != "210px"
+    assert list(site.patches) == ["/a"]
+
+
+def test_broadcast_waits_for_unsaved_render_of_client():
+    side_menu = build_menu()
+    site = StubSite()
+    state = connect(side_menu, site, "/a")
+    site.patches.clear()
+
+    async def request_during_broadcast():
+        async with state.lock:
+            side_menu.select("home", state)
+            q = StubQ(site, "/a")
+            side_menu.render(q, state)
+            side_menu.get_item("about").label = "Changed"
+            broadcast = asyncio.ensure_future(side_menu.broadcast())
+            await asyncio.sleep(0)
+            assert not broadcast.done()  # Waits until the render of the request is saved
+            await q.page.save()
+        return await broadcast
+
+    assert asyncio.run(request_during_broadcast()) == 1
+    request, broadcast = site.patches["/a"]
+    assert "Sub 1" in json.dumps(request)
+    assert "Changed" in json.dumps(broadcast)
+
+
+def test_width_counts_render_items_only_under_rendered_items():
+    deep = SideMenuItem(name="deep", label="D" * 60, render=True)
+    side_menu = SideMenu(
+        items=[
+            SideMenuItem(
+                name="home",
+                label="Home",
+                render=True,
+                sub_items=[SideMenuItem(name="a", label="A", sub_items=[deep])],
+            )
+        ]
+    )
+    state = side_menu.new_state()
+    collapsed_width = side_menu.get_width(state)
+    assert "D" * 60 not in labels(side_menu, state)
+
+    state.expanded.add("home")  # Renders a, and deep with it
+    assert "D" * 60 in labels(side_menu, state)
+    assert side_menu.get_width(state) > collapsed_width
+
+    state.expanded.clear()
+    side_menu.get_item("a").render = True
+    assert side_menu.get_width(state) > collapsed_width
+    side_menu.get_item("a").render = False
+    assert side_menu.get_width(state) == collapsed_width
+
+
+def test_paging_labels_render_again_when_changed():
+    side_menu = SideMenu(
+        items=[SideMenuItem(name=f"i{i}", label=f"Item {i}", render=True) for i in range(10)],
+        window_size=3,
+    )
+    state = side_menu.new_state()
+    assert "Show more" in labels(side_menu, state)
+    side_menu.show_more_label = "Next"
+    assert "Next" in labels(side_menu, state)
+    assert "Show more" not in labels(side_menu, state)
+
+
+def test_page_cards_are_sent_once_per_card_name():
+    side_menu = build_menu()
+    pages = PageRegistry(side_menu, prefetch=False)
+    pages.register("about", lambda: {"view": "markdown", "content": "About"})
+    q = StubQ(StubSite(), "/client")
+    assert asyncio.run(pages.render(q, "about", card_name="main"))
+    assert not asyncio.run(pages.render(q, "about", card_name="main"))
+    assert asyncio.run(pages.render(q, "about", card_name="preview"))
+
+
+def test_badge_source_returning_non_dict_is_counted_as_error(caplog):
+    side_menu = build_menu()
+    sink = HistogramSink()
+    side_menu.instrumentation = Instrumentation(sink)
+    updater = BadgeUpdater(side_menu)
+    updater.add(lambda: ["about", 3])
+    updater.add(lambda: {"help": 2})
+    updater.add(lambda: 5, name="about")
+
+    asyncio.run(updater.refresh())
+    assert side_menu.get_item("help").badge == 2
+    assert side_menu.get_item("about").badge == 5
+    assert "not a dict of badges" in caplog.text
+    assert sink.counters["badge_errors"] == 1
+
+
+def test_shared_menu_loads_sub_items_lazily(tmp_path):
+    path = tmp_path / "menu.smnu"
+    save_shared(build_menu(), path)
+    side_menu = open_shared(path, multi_expand=True)
+    try:
+        assert [item.name for item in side_menu.items] == ["home", "about", "help"]
+        assert side_menu.get_item("sub1") is None  # Not created until home is expanded
+        assert side_menu.item_source.find("sub2") is not None
+
+        state = side_menu.new_state()
+        q = StubQ(StubSite(), "/client")
+        q.args.sub2 = True
+        assert asyncio.run(side_menu.handle_click(q, state)) == "sub2"
+        assert [item.name for item in side_menu.get_ancestors("sub2")] == ["home", "sub1"]
+        assert rendered(side_menu, state) == ["home", "sub1", "sub2", "about", "help"]
+        assert labels(side_menu, state) == labels(build_menu(), state)
+    finally:
+        side_menu.item_source.close()
+
+
+@pytest.mark.parametrize("filename", ["menu.json", "menu.pickle"])
+def test_save_and_load_round_trip(tmp_path, filename):
+    side_menu = build_menu()
+    side_menu.get_item("sub2").label = "A long label of the deepest sub item"
+    side_menu.save(tmp_path / filename)
+    loaded = SideMenu.load(tmp_path / filename)
+
+    assert snapshot(loaded) == snapshot(side_menu)
+    assert loaded.collapsable == side_menu.collapsable
+    for expanded in ((), ("sub2",)):
+        state = side_menu.new_state()
+        for name in expanded:
+            side_menu.select(name, state)
+        assert labels(loaded, state) == labels(side_menu, state)
+        assert loaded.get_width(state) == side_menu.get_width(state)
+
+
+def test_nested_expansion():
+    side_menu = build_menu()
+    state = side_menu.new_state()
+    assert rendered(side_menu, state) == ["home", "about", "help"]
+
+    side_menu.select("sub2", state)  # Expands the ancestors of the clicked item
+    assert state.active_root == "home"
+    assert rendered(side_menu, state) == ["home", "sub1", "sub2", "about", "help"]
+    assert side_menu.get_depth("sub2") == 2
+
+    side_menu.select("sub1", state)  # multi_expand toggles the clicked item
+    assert rendered(side_menu, state) == ["home", "sub1", "about", "help"]
+    side_menu.disable_subitems("home", state)
+    assert rendered(side_menu, state) == ["home", "about", "help"]
+
+
+def test_window_pages_and_follows_clicked_item():
+    side_menu = SideMenu(
+        items=[SideMenuItem(name=f"i{i}", label=f"Item {i}", render=True) for i in range(10)],
+        window_size=3,
+    )
+    state = side_menu.new_state()
+    assert rendered(side_menu, state) == ["i0", "i1", "i2", side_menu.show_more_name]
+
+    side_menu.select(side_menu.show_more_name, state)
+    assert rendered(side_menu, state) == [
+        side_menu.show_previous_name,
+        "i3",
+        "i4",
+        "i5",
+        side_menu.show_more_name,
+    ]
+
+    side_menu.select("i9", state)
+    assert "i9" in rendered(side_menu, state)
+    assert side_menu.show_more_name not in rendered(side_menu, state)
+
+
+def test_search_and_filter():
+    side_menu = build_menu()
+    matches = side_menu.search("sub")
+    assert [match.item.name for match in matches] == ["sub1", "sub2"]
+    assert [item.name for item in matches[1].ancestors] == ["home", "sub1"]
+    assert side_menu.search("nothing like it") == []
+
+    side_menu.get_item("about").label = "Subscriptions"  # The index follows the labels
+    assert [match.item.name for match in side_menu.search("sub")][0] == "about"
+
+    state = side_menu.new_state()
+    side_menu.set_filter("sub 2", state)
+    assert rendered(side_menu, state) == ["home", "sub1", "sub2"]
+    side_menu.set_filter(None, state)
+    assert rendered(side_menu, state) == ["home", "about", "help"]
+
+
+def test_roles_hide_items_and_their_widths():
+    side_menu = build_menu()
+    side_menu.add_item(
+        SideMenuItem(
+            name="admin",
+            label="Administration of all the things",
+            group="Other",
+            render=True,
+            roles={"admin"},
+        )
+    )
+    user, admin = side_menu.new_state(), side_menu.new_state(roles={"admin"})
+
+    assert "admin" not in rendered(side_menu, user)
+    assert "admin" in rendered(side_menu, admin)
+    assert side_menu.get_width(admin) != side_menu.get_width(user)
+    assert side_menu.get_width(user) == build_menu().get_width(user)
+    assert side_menu.search("admin", state=user) == []
+    assert side_menu.select("admin", user) is None
+
+    side_menu.get_item("admin").roles = None  # Masks are compiled again
+    assert "admin" in rendered(side_menu, user)
+
+
+def test_provider_results_are_kept_for_ttl():
+    calls = []
+
+    def provider():
+        calls.append(None)
+        return [SideMenuItem(name="dataset", label=f"Dataset {len(calls)}")]
+
+    side_menu = build_menu()
+    reports = SideMenuItem(
+        name="reports", label="Reports", render=True, sub_items_provider=provider
+    )
+    side_menu.add_item(reports)
+    state = side_menu.new_state()
+
+    q = StubQ(StubSite(), "/client")
+    q.args.reports = True
+    asyncio.run(side_menu.handle_click(q, state))
+    asyncio.run(side_menu.load_expanded(state))
+    assert len(calls) == 1  # Kept forever without a ttl
+    assert "Dataset 1" in labels(side_menu, state)
+
+    reports.sub_items_ttl = 0
+    assert asyncio.run(side_menu.load_sub_items("reports"))
+    assert len(calls) == 2
+    assert "Dataset 2" in labels(side_menu, state)
+    assert side_menu.get_parent_item("dataset") is reports
+
+
+def test_failed_provider_collapses_item(caplog):
+    def provider():
+        raise ConnectionError("database is down")
+
+    side_menu = build_menu()
+    side_menu.add_item(
+        SideMenuItem(name="reports", label="Reports", render=True, sub_items_provider=provider)
+    )
+    state = side_menu.new_state()
+    q = StubQ(StubSite(), "/client")
+    q.args.reports = True
+    asyncio.run(side_menu.handle_click(q, state))
+    assert "reports" not in state.expanded
+    assert "Loading sub items of 'reports' failed" in caplog.text
+
+
+def test_badges_are_rendered_measured_and_sent():
+    side_menu = build_menu()
+    site = StubSite()
+    expanded = connect(side_menu, site, "/expanded", expanded=["sub1"])
+    collapsed = connect(side_menu, site, "/collapsed")
+    site.patches.clear()
+    width = side_menu.get_width(collapsed)
+
+    updater = BadgeUpdater(side_menu)
+    updater.add(lambda: {"sub2": 3})
+    assert asyncio.run(updater.refresh()) == 1
+    assert list(site.patches) == ["/expanded"]
+    assert "Sub 2 (3)" in labels(side_menu, expanded)
+    assert asyncio.run(updater.refresh()) == 0  # Unchanged badges aren't sent
+
+    side_menu.set_badges({"about": "many unread messages in the inbox"})
+    assert side_menu.get_width(collapsed) != width
+    side_menu.badge_format = "{label} [{badge}]"
+    assert "About [many unread messages in the inbox]" in labels(side_menu, collapsed)